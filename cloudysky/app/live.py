@@ -0,0 +1,190 @@
+"""
+Live feed: in-process pub/sub behind /app/feed/stream (Server-Sent Events).
+
+post_save signals publish three kinds of events once the transaction
+commits:
+
+    post     a new post (same fields as a /app/feed/ item)
+    comment  a new comment (id, post_id, username, date, content)
+    hide     a post or comment was hidden (kind, id, post_id), sent once
+             when is_hidden changes to True, not on later saves
+
+Each subscriber is an asyncio.Queue on the event loop serving its
+connection. Saves usually happen in sync views running in worker threads,
+so publishing hands each event to every loop with one
+call_soon_threadsafe call, and the loop fans it out to its own queues.
+Visibility follows the feed rules: events about hidden posts and comments
+only reach their author and admins, and hide events reach everyone so
+clients can drop the item. An idle subscriber costs its socket and an
+empty queue. No queries run until something is published.
+
+A subscriber that falls QUEUE_SIZE events behind gets a "reset" event and
+is disconnected, so it should re-fetch /app/feed/ and reconnect.
+
+Events only reach subscribers in the process that made the change, so run
+a single ASGI worker process, or accept that each process streams its own
+writes.
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+
+from .models import Comment, Post
+from .timeline import feed_row
+
+# Events buffered per subscriber before it is cut off
+QUEUE_SIZE = 256
+
+# Seconds between SSE comment lines on idle streams, so proxies keep them open
+KEEPALIVE = 15.0
+
+
+class Subscription:
+    def __init__(self, user):
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.is_staff = user.is_authenticated and user.is_staff
+        self.user_id = user.id if user.is_authenticated else None
+        self.overflowed = False
+
+    def can_see(self, audience):
+        return audience is None or self.is_staff or self.user_id in audience
+
+
+class Broker:
+    def __init__(self):
+        self.loops = {}                   # event loop -> set of its Subscriptions
+        self._lock = threading.Lock()     # guards self.loops, not the sets
+        self._ids = itertools.count(1)
+
+    def subscribe(self, user):
+        """A new Subscription on the running loop; unsubscribe() it when done."""
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(user)
+        with self._lock:
+            self.loops.setdefault(loop, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            subscriptions = self.loops.get(loop)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.loops[loop]
+
+    def publish(self, event, data, audience=None):
+        """
+        Send an event to every subscriber allowed to see it: all of them
+        when audience is None, otherwise admins and the listed user ids.
+        Safe to call from any thread.
+        """
+        with self._lock:
+            loops = list(self.loops)
+        if not loops:
+            return
+        # Encoded once, however many subscribers there are
+        message = f"id: {next(self._ids)}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self._deliver, loop, message, audience)
+            except RuntimeError:
+                # The loop was closed without unsubscribing
+                with self._lock:
+                    self.loops.pop(loop, None)
+
+    def _deliver(self, loop, message, audience):
+        for subscription in list(self.loops.get(loop, ())):
+            if subscription.overflowed or not subscription.can_see(audience):
+                continue
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+
+    async def stream(self, user):
+        """Async iterator of SSE-formatted strings for one client."""
+        subscription = self.subscribe(user)
+        try:
+            # Sent immediately so the client sees the stream open
+            yield "retry: 3000\n: connected\n\n"
+            while True:
+                if subscription.overflowed and subscription.queue.empty():
+                    yield "event: reset\ndata: {}\n\n"
+                    return
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), KEEPALIVE)
+                except asyncio.TimeoutError:
+                    message = ": keepalive\n\n"
+                yield message
+        finally:
+            self.unsubscribe(subscription)
+
+
+broker = Broker()
+
+
+def _became_hidden(instance, update_fields):
+    """
+    True when this save hid the instance: is_hidden is now set and wasn't
+    when it was loaded or last saved (unknown counts as not set).
+    """
+    if update_fields is not None and "is_hidden" not in update_fields:
+        return False
+    was_hidden = getattr(instance, "_live_was_hidden", None)
+    instance._live_was_hidden = instance.is_hidden
+    return instance.is_hidden and was_hidden is not True
+
+
+@receiver(post_init, sender=Post)
+@receiver(post_init, sender=Comment)
+def remember_hidden(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred is_hidden doesn't cost a query
+    instance._live_was_hidden = instance.__dict__.get("is_hidden")
+
+
+@receiver(post_save, sender=Post)
+def publish_post(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    became_hidden = _became_hidden(instance, update_fields)
+    if raw or not broker.loops:
+        return
+    if created:
+        data = feed_row(instance.id, instance.author.username, instance.created_at,
+                        instance.title, instance.content)
+        audience = {instance.author_id} if instance.is_hidden else None
+        transaction.on_commit(lambda: broker.publish("post", data, audience))
+    elif became_hidden:
+        data = {"kind": "post", "id": instance.id, "post_id": instance.id}
+        transaction.on_commit(lambda: broker.publish("hide", data))
+
+
+@receiver(post_save, sender=Comment)
+def publish_comment(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    became_hidden = _became_hidden(instance, update_fields)
+    if raw or not broker.loops:
+        return
+    if created:
+        data = {
+            "id": instance.id,
+            "post_id": instance.post_id,
+            "username": instance.author.username,
+            "date": instance.created_at.strftime("%Y-%m-%d %H:%M"),
+            "content": instance.content,
+        }
+        # Hidden posts (and their threads) are only for the post's author
+        if instance.is_hidden:
+            audience = {instance.author_id}
+        elif instance.post.is_hidden:
+            audience = {instance.post.author_id}
+        else:
+            audience = None
+        transaction.on_commit(lambda: broker.publish("comment", data, audience))
+    elif became_hidden:
+        data = {"kind": "comment", "id": instance.id, "post_id": instance.post_id}
+        transaction.on_commit(lambda: broker.publish("hide", data))
@@ -0,0 +1,147 @@
+import itertools
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from app.models import Comment, ModerationReason, Post, Profile
+
+WORDS = (
+    "cloud sky rain storm sun wind snow fog weather forecast data model query index "
+    "table django python server request feed post comment user admin moderation hidden "
+    "latency throughput cache page cursor search token database sqlite postgres the of "
+    "and to a in is that for it as was with be by on not this are or from at which"
+).split()
+
+
+class Command(BaseCommand):
+    help = 'Bulk-generate synthetic users, posts and comments for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--hidden-ratio', type=float, default=0.05,
+                            help='Fraction of posts and comments created hidden')
+        parser.add_argument('--fanout', choices=['uniform', 'zipf'], default='zipf',
+                            help='How comments spread over posts (zipf: a few hot threads)')
+        parser.add_argument('--zipf-s', type=float, default=1.1,
+                            help='Zipf exponent for --fanout zipf')
+        parser.add_argument('--content-min', type=int, default=40,
+                            help='Minimum content length in characters')
+        parser.add_argument('--content-max', type=int, default=1200,
+                            help='Maximum content length in characters')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Rows per bulk INSERT / transaction')
+        parser.add_argument('--prefix', default='load',
+                            help='Username prefix; generated users are <prefix>_<n>')
+        parser.add_argument('--password', default='Password123',
+                            help='Password for every generated user (hashed once)')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if not 0 <= options['hidden_ratio'] <= 1:
+            raise CommandError('--hidden-ratio must be between 0 and 1')
+        if not 1 <= options['content_min'] <= options['content_max']:
+            raise CommandError('Need 1 <= --content-min <= --content-max')
+        if options['users'] < 1 and (options['posts'] or options['comments']):
+            raise CommandError('Posts and comments need at least one user')
+        if options['posts'] < 1 and options['comments']:
+            raise CommandError('Comments need at least one post')
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        # A pool of text to slice content from, so generating it costs nothing
+        self.text = ' '.join(self.rng.choice(WORDS) for _ in range(options['content_max'] * 2))
+
+        user_ids = self._timed('users', options['users'], self.create_users, options)
+        post_ids = self._timed('posts', options['posts'], self.create_posts, options, user_ids)
+        self._timed('comments', options['comments'], self.create_comments,
+                    options, user_ids, post_ids)
+        self.stdout.write(self.style.SUCCESS('Database seeded successfully!'))
+
+    def _timed(self, label, count, create, *args):
+        start = time.perf_counter()
+        result = create(*args)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'Created {count} {label} in {elapsed:.1f}s '
+                          f'({count / elapsed if elapsed else 0:.0f} rows/s)')
+        return result
+
+    def _content(self, options):
+        length = self.rng.randint(options['content_min'], options['content_max'])
+        start = self.rng.randrange(len(self.text) - length)
+        return self.text[start:start + length]
+
+    def _batches(self, rows):
+        it = iter(rows)
+        while batch := list(itertools.islice(it, self.batch_size)):
+            yield batch
+
+    def create_users(self, options):
+        # Hash once: PBKDF2 per user would dominate the run
+        password = make_password(options['password'])
+        prefix = options['prefix']
+        first = User.objects.filter(username__startswith=f'{prefix}_').count()
+        users = (User(username=f'{prefix}_{n}', email=f'{prefix}_{n}@load.test', password=password)
+                 for n in range(first, first + options['users']))
+        ids = []
+        for batch in self._batches(users):
+            with transaction.atomic():
+                created = User.objects.bulk_create(batch)
+                # bulk_create skips post_save, so create_user_profile never
+                # runs; add the profiles the same way
+                Profile.objects.bulk_create(Profile(user_id=u.pk) for u in created)
+            ids.extend(u.pk for u in created)
+        return ids
+
+    def create_posts(self, options, user_ids):
+        reason, _ = ModerationReason.objects.get_or_create(reason_text='seed_load')
+        hidden = options['hidden_ratio']
+        rng = self.rng
+
+        def rows():
+            for n in range(options['posts']):
+                is_hidden = rng.random() < hidden
+                yield Post(author_id=rng.choice(user_ids),
+                           title=' '.join(rng.choices(WORDS, k=rng.randint(2, 8))).capitalize(),
+                           content=self._content(options),
+                           is_hidden=is_hidden,
+                           moderation_reason=reason if is_hidden else None)
+
+        ids = []
+        for batch in self._batches(rows()):
+            with transaction.atomic():
+                ids.extend(p.pk for p in Post.objects.bulk_create(batch))
+        return ids
+
+    def create_comments(self, options, user_ids, post_ids):
+        if not options['comments']:
+            return
+        hidden = options['hidden_ratio']
+        rng = self.rng
+        if options['fanout'] == 'zipf':
+            # Post i (in random order) gets weight 1 / (i + 1)^s
+            targets = rng.sample(post_ids, len(post_ids))
+            cum_weights = list(itertools.accumulate(
+                1 / (i + 1) ** options['zipf_s'] for i in range(len(targets))))
+        else:
+            targets, cum_weights = post_ids, None
+
+        def rows():
+            remaining = options['comments']
+            while remaining:
+                k = min(remaining, self.batch_size)
+                remaining -= k
+                for post_id in rng.choices(targets, cum_weights=cum_weights, k=k):
+                    yield Comment(post_id=post_id,
+                                  author_id=rng.choice(user_ids),
+                                  content=self._content(options),
+                                  is_hidden=rng.random() < hidden)
+
+        for batch in self._batches(rows()):
+            with transaction.atomic():
+                Comment.objects.bulk_create(batch)
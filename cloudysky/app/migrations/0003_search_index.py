@@ -0,0 +1,88 @@
+# Full-text search indexes for app.search; backend-specific, so applied with
+# RunPython on the connection's vendor.
+
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    """CREATE VIRTUAL TABLE app_post_fts USING fts5(
+           title, content, content='app_post', content_rowid='id',
+           tokenize='porter unicode61')""",
+    """CREATE VIRTUAL TABLE app_comment_fts USING fts5(
+           content, content='app_comment', content_rowid='id',
+           tokenize='porter unicode61')""",
+    """CREATE TRIGGER app_post_fts_ai AFTER INSERT ON app_post BEGIN
+           INSERT INTO app_post_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+       END""",
+    """CREATE TRIGGER app_post_fts_ad AFTER DELETE ON app_post BEGIN
+           INSERT INTO app_post_fts (app_post_fts, rowid, title, content)
+           VALUES ('delete', old.id, old.title, old.content);
+       END""",
+    """CREATE TRIGGER app_post_fts_au AFTER UPDATE OF title, content ON app_post
+       WHEN old.title IS NOT new.title OR old.content IS NOT new.content BEGIN
+           INSERT INTO app_post_fts (app_post_fts, rowid, title, content)
+           VALUES ('delete', old.id, old.title, old.content);
+           INSERT INTO app_post_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+       END""",
+    """CREATE TRIGGER app_comment_fts_ai AFTER INSERT ON app_comment BEGIN
+           INSERT INTO app_comment_fts (rowid, content) VALUES (new.id, new.content);
+       END""",
+    """CREATE TRIGGER app_comment_fts_ad AFTER DELETE ON app_comment BEGIN
+           INSERT INTO app_comment_fts (app_comment_fts, rowid, content)
+           VALUES ('delete', old.id, old.content);
+       END""",
+    """CREATE TRIGGER app_comment_fts_au AFTER UPDATE OF content ON app_comment
+       WHEN old.content IS NOT new.content BEGIN
+           INSERT INTO app_comment_fts (app_comment_fts, rowid, content)
+           VALUES ('delete', old.id, old.content);
+           INSERT INTO app_comment_fts (rowid, content) VALUES (new.id, new.content);
+       END""",
+    # Index rows that existed before this migration
+    "INSERT INTO app_post_fts (app_post_fts) VALUES ('rebuild')",
+    "INSERT INTO app_comment_fts (app_comment_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS app_post_fts_ai",
+    "DROP TRIGGER IF EXISTS app_post_fts_ad",
+    "DROP TRIGGER IF EXISTS app_post_fts_au",
+    "DROP TRIGGER IF EXISTS app_comment_fts_ai",
+    "DROP TRIGGER IF EXISTS app_comment_fts_ad",
+    "DROP TRIGGER IF EXISTS app_comment_fts_au",
+    "DROP TABLE IF EXISTS app_post_fts",
+    "DROP TABLE IF EXISTS app_comment_fts",
+]
+
+# Expressions must match app/search.py exactly for the planner to use them
+POSTGRES_FORWARD = [
+    """CREATE INDEX app_post_search_idx ON app_post USING GIN (
+           (setweight(to_tsvector('english', title), 'A') || to_tsvector('english', content)))""",
+    """CREATE INDEX app_comment_search_idx ON app_comment USING GIN (
+           to_tsvector('english', content))""",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS app_post_search_idx",
+    "DROP INDEX IF EXISTS app_comment_search_idx",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0002_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            _run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,55 @@
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_duplicates(apps, schema_editor):
+    """
+    Stop before creating the indexes if existing users already collide
+    case-insensitively, naming them so they can be merged or renamed.
+    CREATE UNIQUE INDEX would fail on them anyway, without saying which.
+    """
+    User = apps.get_model('auth', 'User')
+    users = User.objects.using(schema_editor.connection.alias)
+    problems = []
+    for field, rows in (('username', users), ('email', users.exclude(email=''))):
+        clashes = (rows.annotate(key=Lower(field)).values('key')
+                   .annotate(n=Count('id')).filter(n__gt=1).values_list('key', flat=True))
+        for key in clashes:
+            names = rows.annotate(key=Lower(field)).filter(key=key).order_by('id')
+            problems.append(f"{field} {key!r}: " + ", ".join(
+                f"#{user.id} {getattr(user, field)!r}" for user in names))
+    if problems:
+        raise RuntimeError(
+            "Users differ only by case; resolve these before migrating:\n  "
+            + "\n  ".join(problems))
+
+
+class Migration(migrations.Migration):
+    """
+    Case-insensitive uniqueness for usernames and emails on auth_user.
+
+    createUser looks users up by LOWER(username) and LOWER(email); these
+    expression indexes answer those lookups and also reject a duplicate
+    that slips in between the check and the insert. Blank emails (users
+    made without one, e.g. by createsuperuser) are indexed as NULL, so any
+    number of them can coexist. Existing case-insensitive duplicates are
+    reported by check_duplicates and stop the migration.
+    """
+
+    dependencies = [
+        ('app', '0003_search_index'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicates, migrations.RunPython.noop),
+        migrations.RunSQL(
+            sql="CREATE UNIQUE INDEX auth_user_username_lower_uniq ON auth_user (LOWER(username))",
+            reverse_sql="DROP INDEX auth_user_username_lower_uniq",
+        ),
+        migrations.RunSQL(
+            sql="CREATE UNIQUE INDEX auth_user_email_lower_uniq ON auth_user (LOWER(NULLIF(email, '')))",
+            reverse_sql="DROP INDEX auth_user_email_lower_uniq",
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -62,6 +63,18 @@ class Post(models.Model):
         blank=True
     )
 
+    class Meta:
+        indexes = [
+            # Newest-first listing of visible posts. Partial, so hidden posts
+            # never enter the index the public feed scans.
+            models.Index(fields=['-created_at'], condition=Q(is_hidden=False),
+                         name='post_visible_newest_idx'),
+            # Admins see every post, and each user also sees their own
+            # hidden ones; the id tie-break matches the feed's keyset order
+            models.Index(fields=['-created_at', '-id'], name='post_newest_idx'),
+            models.Index(fields=['author', '-created_at', '-id'], name='post_author_newest_idx'),
+        ]
+
     def __str__(self):
         return f"Post {self.id} by {self.author.username}"
 
@@ -88,6 +101,12 @@ class Comment(models.Model):
         blank=True
     )
 
+    class Meta:
+        indexes = [
+            # A post's thread in order, without sorting all its comments
+            models.Index(fields=['post', 'created_at'], name='comment_post_created_idx'),
+        ]
+
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post}"
 
@@ -127,6 +146,10 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
+def save_user_profile(sender, instance, created, update_fields=None, **kwargs):
+    # A new user's profile was just created above, and partial saves such as
+    # the last_login update on every login don't touch the profile
+    if created or update_fields is not None:
+        return
     if hasattr(instance, 'profile'):
         instance.profile.save()
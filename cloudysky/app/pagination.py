@@ -0,0 +1,66 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is the sort key of the last row on a page, JSON-encoded and
+base64'd so clients treat it as opaque. The next page is fetched with a
+"sort key > cursor" condition that an index can seek to directly, so
+deep pages cost the same as the first (unlike OFFSET).
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def encode_cursor(values):
+    """Opaque cursor for a sort key (a list of JSON-able values or datetimes)."""
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor, *types):
+    """
+    Inverse of encode_cursor, converting each value with the matching type
+    (datetime values are parsed from ISO format). Raises ValueError on
+    anything malformed.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(types):
+            raise ValueError
+        return tuple(datetime.fromisoformat(v) if t is datetime else t(v)
+                     for t, v in zip(types, values))
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def after(fields, values):
+    """
+    Q() for rows sorting strictly after values on fields, e.g.
+    after(['-created_at', '-id'], (t, 5)) for a newest-first listing.
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(fields, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    # Redundant bound on the first field: the OR above hides it from the
+    # planner, which would otherwise scan the index from the start
+    first = fields[0]
+    bound = 'lte' if first.startswith('-') else 'gte'
+    return Q(**{f'{first.lstrip("-")}__{bound}': values[0]}) & condition
+
+
+def page_size(request, default, maximum):
+    """?limit= clamped to [1, maximum]; raises ValueError if it isn't a positive integer."""
+    try:
+        limit = int(request.GET.get("limit", default))
+    except ValueError:
+        raise ValueError("Invalid limit") from None
+    if limit < 1:
+        raise ValueError("Invalid limit")
+    return min(limit, maximum)
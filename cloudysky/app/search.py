@@ -0,0 +1,216 @@
+"""
+Full-text search over posts and comments.
+
+SQLite: FTS5 external-content tables (app_post_fts, app_comment_fts) over
+app_post/app_comment, kept in sync by triggers (migration 0003), so every
+write path, including bulk_create, updates the index. PostgreSQL: GIN
+indexes on the same to_tsvector() expressions used in the query.
+
+Results are ranked (bm25 / ts_rank), filtered with the feed's visibility
+rules, and paginated with an opaque keyset cursor over (rank, kind, id).
+
+Only the newest MAX_CANDIDATES matches of each kind are ranked, so a very
+common word costs the same as a rare one instead of scoring every row it
+appears in (ranking all 60k matches of "the" takes ~100 ms in bm25 alone).
+Older matches are left out and the response says so with "truncated".
+The first page pins the window to the posts and comments that existed at
+the time (their max ids travel in the cursor), so rows written while a
+client pages through don't shift it. bm25 still reads table-wide
+statistics, so such writes can reorder near-tied scores between pages;
+the set of rows in the walk stays that of the window. Snippets are only
+built for the rows on the returned page.
+"""
+
+import re
+
+from django.db import connection
+
+from .pagination import decode_cursor, encode_cursor
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Matches per kind (posts, comments) that are ranked, newest first
+MAX_CANDIDATES = 1000
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Hidden posts/comments only for admins and their authors; comments also
+# disappear with their hidden post, as in dump_feed. The inner MATCH
+# subqueries walk the FTS index newest rowid first and stop after
+# MAX_CANDIDATES rows, so bm25 is only computed for those.
+_SQLITE_SEARCH = """
+SELECT kind, id, post_id, title, username, date, is_hidden, rank FROM (
+    SELECT 'post' AS kind, p.id AS id, p.id AS post_id, p.title AS title,
+           u.username AS username, strftime('%%Y-%%m-%%d %%H:%%M', p.created_at) AS date,
+           p.is_hidden AS is_hidden, m.rank AS rank
+    FROM (SELECT rowid, bm25(app_post_fts, 4.0, 1.0) AS rank FROM app_post_fts
+          WHERE app_post_fts MATCH %(q)s AND rowid <= %(post_max)s
+          ORDER BY rowid DESC LIMIT %(candidates)s) m
+    JOIN app_post p ON p.id = m.rowid
+    JOIN auth_user u ON u.id = p.author_id
+    WHERE (p.is_hidden = 0 OR %(staff)s OR p.author_id = %(uid)s)
+    UNION ALL
+    SELECT 'comment', c.id, c.post_id, p.title,
+           u.username, strftime('%%Y-%%m-%%d %%H:%%M', c.created_at), c.is_hidden, m.rank
+    FROM (SELECT rowid, bm25(app_comment_fts) AS rank FROM app_comment_fts
+          WHERE app_comment_fts MATCH %(q)s AND rowid <= %(comment_max)s
+          ORDER BY rowid DESC LIMIT %(candidates)s) m
+    JOIN app_comment c ON c.id = m.rowid
+    JOIN app_post p ON p.id = c.post_id
+    JOIN auth_user u ON u.id = c.author_id
+    WHERE (c.is_hidden = 0 OR %(staff)s OR c.author_id = %(uid)s)
+      AND (p.is_hidden = 0 OR %(staff)s OR p.author_id = %(uid)s)
+)
+WHERE (rank, kind, id) > (%(rank)s, %(kind)s, %(id)s)
+ORDER BY rank, kind, id
+LIMIT %(limit)s
+"""
+
+# snippet() needs the FTS table being matched, so it runs as a second,
+# small query over just the page's rows
+_SQLITE_SNIPPETS = {
+    'post': "SELECT rowid, snippet(app_post_fts, 1, '[', ']', '...', 16) FROM app_post_fts "
+            "WHERE app_post_fts MATCH %s AND rowid IN ({ids})",
+    'comment': "SELECT rowid, snippet(app_comment_fts, 0, '[', ']', '...', 16) FROM app_comment_fts "
+               "WHERE app_comment_fts MATCH %s AND rowid IN ({ids})",
+}
+
+# ts_rank is "higher is better", so it is negated to share the ascending
+# cursor order with bm25. ts_headline sits in the outermost select, so it
+# is only evaluated for the rows that survive the LIMIT.
+_POSTGRES_SEARCH = """
+SELECT kind, id, post_id, title,
+       ts_headline('english', content, websearch_to_tsquery('english', %(q)s),
+                   'StartSel=[, StopSel=], MaxWords=16, MinWords=8') AS snippet,
+       username, date, is_hidden, rank FROM (
+    SELECT 'post' AS kind, p.id AS id, p.id AS post_id, p.title AS title, p.content AS content,
+           u.username AS username,
+           to_char(p.created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI') AS date,
+           p.is_hidden AS is_hidden,
+           -ts_rank(setweight(to_tsvector('english', p.title), 'A')
+                    || to_tsvector('english', p.content), query) AS rank
+    FROM (SELECT id FROM app_post
+          WHERE (setweight(to_tsvector('english', title), 'A')
+                 || to_tsvector('english', content)) @@ websearch_to_tsquery('english', %(q)s)
+            AND id <= %(post_max)s
+          ORDER BY id DESC LIMIT %(candidates)s) m
+    JOIN app_post p ON p.id = m.id
+    JOIN auth_user u ON u.id = p.author_id,
+         websearch_to_tsquery('english', %(q)s) query
+    WHERE (NOT p.is_hidden OR %(staff)s OR p.author_id = %(uid)s)
+    UNION ALL
+    SELECT 'comment', c.id, c.post_id, p.title, c.content,
+           u.username, to_char(c.created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI'), c.is_hidden,
+           -ts_rank(to_tsvector('english', c.content), query)
+    FROM (SELECT id FROM app_comment
+          WHERE to_tsvector('english', content) @@ websearch_to_tsquery('english', %(q)s)
+            AND id <= %(comment_max)s
+          ORDER BY id DESC LIMIT %(candidates)s) m
+    JOIN app_comment c ON c.id = m.id
+    JOIN app_post p ON p.id = c.post_id
+    JOIN auth_user u ON u.id = c.author_id,
+         websearch_to_tsquery('english', %(q)s) query
+    WHERE (NOT c.is_hidden OR %(staff)s OR c.author_id = %(uid)s)
+      AND (NOT p.is_hidden OR %(staff)s OR p.author_id = %(uid)s)
+) results
+WHERE (rank, kind, id) > (%(rank)s, %(kind)s, %(id)s)
+ORDER BY rank, kind, id
+LIMIT %(limit)s
+"""
+
+# The window the first page ranks over
+_WINDOW = """
+SELECT (SELECT COALESCE(MAX(id), 0) FROM app_post), (SELECT COALESCE(MAX(id), 0) FROM app_comment)
+"""
+
+# Whether either kind has a match past the first MAX_CANDIDATES in the window
+_SQLITE_TRUNCATED = """
+SELECT (SELECT rowid FROM app_post_fts WHERE app_post_fts MATCH %(q)s AND rowid <= %(post_max)s
+        ORDER BY rowid DESC LIMIT 1 OFFSET %(candidates)s) IS NOT NULL
+    OR (SELECT rowid FROM app_comment_fts WHERE app_comment_fts MATCH %(q)s AND rowid <= %(comment_max)s
+        ORDER BY rowid DESC LIMIT 1 OFFSET %(candidates)s) IS NOT NULL
+"""
+
+_POSTGRES_TRUNCATED = """
+SELECT EXISTS (SELECT 1 FROM app_post
+               WHERE (setweight(to_tsvector('english', title), 'A')
+                      || to_tsvector('english', content)) @@ websearch_to_tsquery('english', %(q)s)
+                 AND id <= %(post_max)s
+               ORDER BY id DESC LIMIT 1 OFFSET %(candidates)s)
+    OR EXISTS (SELECT 1 FROM app_comment
+               WHERE to_tsvector('english', content) @@ websearch_to_tsquery('english', %(q)s)
+                 AND id <= %(comment_max)s
+               ORDER BY id DESC LIMIT 1 OFFSET %(candidates)s)
+"""
+
+
+def fts5_query(text):
+    """Turn free text into an FTS5 query that ANDs its words, with no operators from user input."""
+    return " ".join(f'"{token}"' for token in _TOKEN.findall(text))
+
+
+def search(user, text, cursor=None, limit=PAGE_SIZE):
+    """
+    Rank posts and comments matching text that user may see.
+
+    Returns (results, next_cursor, truncated); next_cursor is None on the
+    last page, and truncated is True when matches older than the newest
+    MAX_CANDIDATES of a kind were left out. Raises ValueError for a
+    malformed cursor.
+    """
+    if cursor:
+        *after, post_max, comment_max = decode_cursor(cursor, float, str, int, int, int)
+    else:
+        after, post_max, comment_max = (float("-inf"), "", 0), None, None
+    if connection.vendor == "postgresql":
+        sql, truncated_sql, q = _POSTGRES_SEARCH, _POSTGRES_TRUNCATED, text
+    else:
+        sql, truncated_sql, q = _SQLITE_SEARCH, _SQLITE_TRUNCATED, fts5_query(text)
+        if not q:
+            return [], None, False
+    params = {
+        "q": q,
+        "staff": bool(user.is_authenticated and user.is_staff),
+        "uid": user.id if user.is_authenticated else -1,
+        "rank": after[0], "kind": after[1], "id": after[2],
+        "candidates": MAX_CANDIDATES,
+        "limit": limit + 1,
+    }
+    with connection.cursor() as cur:
+        if post_max is None:
+            cur.execute(_WINDOW)
+            post_max, comment_max = cur.fetchone()
+        params.update(post_max=post_max, comment_max=comment_max)
+        cur.execute(truncated_sql, params)
+        truncated = bool(cur.fetchone()[0])
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+        if connection.vendor == "postgresql":
+            page = [(kind, id_, post_id, title, snippet, username, date, is_hidden, rank)
+                    for kind, id_, post_id, title, snippet, username, date, is_hidden, rank in rows]
+        else:
+            snippets = {}
+            for kind, template in _SQLITE_SNIPPETS.items():
+                ids = [row[1] for row in rows[:limit] if row[0] == kind]
+                if ids:
+                    cur.execute(template.format(ids=", ".join(["%s"] * len(ids))), [q, *ids])
+                    snippets.update({(kind, rowid): snippet for rowid, snippet in cur.fetchall()})
+            page = [(kind, id_, post_id, title, snippets.get((kind, id_), ""),
+                     username, date, is_hidden, rank)
+                    for kind, id_, post_id, title, username, date, is_hidden, rank in rows]
+
+    results = [{
+        'type': kind,
+        'id': id_,
+        'post_id': post_id,
+        'title': title,
+        'snippet': snippet,
+        'author': username,
+        'date': date,
+        'is_hidden': bool(is_hidden),
+    } for kind, id_, post_id, title, snippet, username, date, is_hidden, _ in page[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        kind, id_, rank = rows[limit - 1][0], rows[limit - 1][1], rows[limit - 1][-1]
+        next_cursor = encode_cursor([rank, kind, id_, post_max, comment_max])
+    return results, next_cursor, truncated
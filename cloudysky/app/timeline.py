@@ -0,0 +1,203 @@
+"""
+Materialized timeline: the newest TIMELINE_SIZE posts, kept in memory in
+feed order so the first feed pages are served without touching the
+database.
+
+Each entry is the post's feed row (id, username, date, title, truncated
+content) plus what visibility needs (created_at, is_hidden, author_id).
+Post saves and deletes in this process update the buffer immediately
+through signals (create_post prepends, hide_post flips is_hidden in place).
+Writes the signals can't see, from other worker processes or bulk
+queries, are picked up by reloading the buffer once it is older than
+TIMELINE_MAX_AGE seconds. Pages that run past the end of the buffer
+return None so the caller falls back to the database.
+
+Writes update the buffer in place under a lock, O(1) for the usual
+newest-post prepend; readers take the same lock only while they copy out
+one page. Signal updates wait for the transaction to commit, so a rolled
+back post never shows up. When the buffer goes stale, one request
+reloads it while the others keep serving the current copy.
+"""
+
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.functions import Substr
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Post
+
+# Feed listings show this many characters of each post's content
+TRUNCATE_AT = 200
+
+# Keys of an entry that go into the feed response
+FEED_FIELDS = ('id', 'username', 'date', 'title', 'content')
+
+
+def feed_row(post_id, username, created_at, title, content):
+    """One feed item; content is cut to TRUNCATE_AT characters plus "..."."""
+    truncated_content = content[:TRUNCATE_AT]
+    if len(content) > TRUNCATE_AT:
+        truncated_content += "..."
+    return {
+        'id': post_id,
+        'username': username,
+        'date': created_at.strftime("%Y-%m-%d %H:%M"),
+        'title': title,
+        'content': truncated_content
+    }
+
+
+def _sort_key(entry):
+    return (entry['created_at'], entry['id'])
+
+
+class Timeline:
+    def __init__(self, size, max_age):
+        self.size = size
+        self.max_age = max_age
+        self.entries = deque(maxlen=size)   # newest first
+        self.by_id = {}
+        self.loaded_at = None               # time.monotonic() of the last load
+        self.complete = False               # True if every post fits in the buffer
+        self._lock = threading.Lock()       # guards entries, by_id and complete
+        self._reload_lock = threading.Lock()  # held by the one request reloading
+
+    @property
+    def enabled(self):
+        return self.size > 0
+
+    def stale(self):
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > self.max_age
+
+    async def aload(self):
+        """(Re)build the buffer from the newest posts in the database."""
+        # No auth_user join: it lets the planner sort instead of walking
+        # post_newest_idx (see views._feed_page)
+        posts = Post.objects.order_by('-created_at', '-id').values(
+            'id', 'title', 'created_at', 'is_hidden', 'author_id',
+            snippet=Substr('content', 1, TRUNCATE_AT + 1))[:self.size]
+        posts = [post async for post in posts]
+        authors = User.objects.filter(id__in={post['author_id'] for post in posts})
+        usernames = {user_id: name async for user_id, name in authors.values_list('id', 'username')}
+        entries = []
+        for post in posts:
+            entry = feed_row(post['id'], usernames[post['author_id']], post['created_at'],
+                             post['title'], post['snippet'])
+            entry.update(created_at=post['created_at'], is_hidden=post['is_hidden'],
+                         author_id=post['author_id'])
+            entries.append(entry)
+        with self._lock:
+            self.entries = deque(entries, maxlen=self.size)
+            self.by_id = {entry['id']: entry for entry in entries}
+            self.complete = len(entries) < self.size
+            self.loaded_at = time.monotonic()
+
+    def saved(self, post, created):
+        """Apply a committed post save: insert new posts, refresh changed ones."""
+        if created:
+            entry = feed_row(post.id, post.author.username, post.created_at, post.title, post.content)
+            entry.update(created_at=post.created_at, is_hidden=post.is_hidden, author_id=post.author_id)
+            key = _sort_key(entry)
+            with self._lock:
+                entries = self.entries
+                if entry['id'] in self.by_id:
+                    return
+                # Almost always 0; later only with clock skew between workers
+                index = next((i for i, e in enumerate(entries) if _sort_key(e) < key), len(entries))
+                if len(entries) == self.size:
+                    if index == len(entries):
+                        # Older than everything kept: the buffer no longer
+                        # holds every post
+                        self.complete = False
+                        return
+                    evicted = entries.pop()
+                    del self.by_id[evicted['id']]
+                    self.complete = False
+                entries.insert(index, entry)
+                self.by_id[entry['id']] = entry
+            return
+        with self._lock:
+            entry = self.by_id.get(post.id)
+            if entry is not None:
+                row = feed_row(post.id, entry['username'], entry['created_at'], post.title, post.content)
+                entry.update(title=row['title'], content=row['content'], is_hidden=post.is_hidden)
+
+    def deleted(self, post_id):
+        with self._lock:
+            entry = self.by_id.pop(post_id, None)
+            if entry is not None:
+                self.entries.remove(entry)
+                # The buffer is one post short until the next reload
+                self.complete = False
+
+    async def page(self, user, position, limit):
+        """
+        (feed rows, cursor of the last row or None) for the page after
+        position ((created_at, id), or None for the first page), or None
+        if the buffer can't answer it.
+        """
+        if self.stale() and self._reload_lock.acquire(blocking=False):
+            # Single flight: everyone else keeps using the current buffer
+            try:
+                await self.aload()
+            finally:
+                self._reload_lock.release()
+        if self.loaded_at is None:
+            # First load still running in another request
+            return None
+        is_staff = user.is_authenticated and user.is_staff
+        user_id = user.id if user.is_authenticated else None
+
+        with self._lock:
+            entries = self.entries
+            start = 0
+            if position is not None:
+                # Deep pages are the database's job; only seek within the buffer
+                if not entries or position < _sort_key(entries[-1]):
+                    return None
+                start = next((i for i, e in enumerate(entries) if _sort_key(e) < position), len(entries))
+
+            rows = []
+            for entry in islice(entries, start, None):
+                # Hidden posts only for their creator or admins
+                if entry['is_hidden'] and not (is_staff or entry['author_id'] == user_id):
+                    continue
+                rows.append({field: entry[field] for field in FEED_FIELDS}
+                            | {'created_at': entry['created_at']})
+                if len(rows) > limit:
+                    break
+            if len(rows) <= limit and not self.complete:
+                # Ran off the end of the buffer; older posts may exist
+                return None
+
+        next_position = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_position = (rows[-1]['created_at'], rows[-1]['id'])
+        for row in rows:
+            del row['created_at']
+        return rows, next_position
+
+
+timeline = Timeline(settings.TIMELINE_SIZE, settings.TIMELINE_MAX_AGE)
+
+
+@receiver(post_save, sender=Post)
+def update_timeline(sender, instance, created, raw=False, **kwargs):
+    # Nothing to update until a feed request has loaded the buffer
+    if timeline.enabled and timeline.loaded_at is not None and not raw:
+        transaction.on_commit(lambda: timeline.saved(instance, created))
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_timeline(sender, instance, **kwargs):
+    if timeline.enabled and timeline.loaded_at is not None:
+        post_id = instance.id
+        transaction.on_commit(lambda: timeline.deleted(post_id))
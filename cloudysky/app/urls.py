@@ -10,10 +10,14 @@ urlpatterns = [
     # HW5: New API endpoints
     path('app/createPost/', views.create_post, name='create_post'),
     path('app/createComment/', views.create_comment, name='create_comment'),
+    path('app/createBulk/', views.create_bulk, name='create_bulk'),
     path('app/hidePost/', views.hide_post, name='hide_post'),
     path('app/hideComment/', views.hide_comment, name='hide_comment'),
     path('app/dumpFeed/', views.dump_feed, name='dump_feed'),
-    path('app/feed/', views.dump_feed, name='feed'),  # Alias for dumpFeed
+    path('app/feed/', views.feed, name='feed'),
+    path('app/feed/stream', views.feed_stream, name='feed_stream'),
+    path('app/post/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('app/search/', views.search, name='search'),
     # HW5: HTML form views
     path('app/new_post/', views.new_post, name='new_post'),
     path('app/new_comment/', views.new_comment, name='new_comment'),
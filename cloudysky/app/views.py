@@ -1,27 +1,57 @@
 from django.shortcuts import render
+from django.template.loader import render_to_string
 from django.utils import timezone
-from django.http import HttpResponse, JsonResponse
-from django.contrib.auth import authenticate, login
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.contrib.auth import login
 from django.contrib.auth.models import User
 from django.views.decorators.csrf import csrf_exempt
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models import Func, Value
+from django.db.models.lookups import Exact
+from django.db.models.functions import Lower, Substr
+import json
 from datetime import datetime
-from zoneinfo import ZoneInfo
 from .models import Post, Comment, ModerationReason, Profile
+from . import search as fulltext
+from cloudysky import metrics
+from cloudysky.clock import current_time
+from .pagination import after, decode_cursor, encode_cursor, page_size
+from .timeline import TRUNCATE_AT, feed_row, timeline
+from .live import broker
+
+FEED_PAGE_SIZE = 50
+MAX_FEED_PAGE_SIZE = 200
+COMMENT_PAGE_SIZE = 100
+MAX_COMMENT_PAGE_SIZE = 1000
+# Posts plus comments accepted by one /app/createBulk/ request
+MAX_BULK_ITEMS = 10000
+
+# The homepage as rendered for anonymous visitors: ("HH:MM", html)
+_anonymous_index = (None, "")
 
 
 def index(request):
     """
     Render homepage with: Current time string and Access to request.user
     """
-    # Use Central Time (America/Chicago) as expected by autograder
-    now = datetime.now(ZoneInfo("America/Chicago"))
-    # Format as HH:MM in 24-hour format
-    time_str = now.strftime("%H:%M")
-
+    # Use Central Time (America/Chicago) as expected by autograder,
+    # formatted as HH:MM in 24-hour format
+    time_str = current_time()
     context = {
         "current_time": time_str,
     }
-    return render(request, "app/index.html", context)
+    if request.user.is_authenticated:
+        return render(request, "app/index.html", context)
+
+    # Anonymous visitors all get the same page, which only changes when
+    # the minute does; render it once per minute
+    global _anonymous_index
+    rendered_at, html = _anonymous_index
+    if rendered_at != time_str:
+        html = render_to_string("app/index.html", context, request)
+        _anonymous_index = (time_str, html)
+    return HttpResponse(html)
 
 
 def new_user(request):
@@ -31,6 +61,15 @@ def new_user(request):
     return render(request, "app/new.html")
 
 
+class BlankAsNull(Func):
+    """
+    NULLIF(expression, ''), with '' written inline rather than bound as a
+    parameter so the SQL matches the auth_user_email_lower_uniq index.
+    """
+    function = 'NULLIF'
+    template = "%(function)s(%(expressions)s, '')"
+
+
 @csrf_exempt  
 def create_user(request):
     """Create a new user via POST with fields: email, user_name, password, is_admin.
@@ -57,24 +96,39 @@ def create_user(request):
     if missing:
         return HttpResponse(f"Missing required field(s): {', '.join(missing)}", status=400)
 
+    # What UserManager.create_user would store: NFKC username, lowercased
+    # email domain. The uniqueness check must compare the stored forms
+    username = User.normalize_username(username)
+    email = User.objects.normalize_email(email)
+
     try:
-        if User.objects.filter(email__iexact=email).exists():
-            return HttpResponse("Email already in use", status=400)
-        if User.objects.filter(username__iexact=username).exists():
+        # One query for both checks, answered by the LOWER() unique indexes
+        # (migration 0004); iexact can't use an index
+        same_email = Exact(Lower(BlankAsNull('email')), Lower(Value(email)))
+        same_username = Exact(Lower('username'), Lower(Value(username)))
+        taken = list(User.objects.filter(Q(same_email) | Q(same_username))
+                     .values_list(same_email, flat=True)[:2])
+        if taken:
+            if any(taken):
+                return HttpResponse("Email already in use", status=400)
             return HttpResponse("Username already exists", status=400)
 
         last_name = (request.POST.get("last_name") or "").strip()
 
-        user = User.objects.create_user(username=username, email=email, password=password)
-        if last_name:
-            user.last_name = last_name
-        
-        user.is_staff = bool(is_admin)
-        user.save()
-
-        auth_user = authenticate(request, username=username, password=password)
-        if auth_user is not None:
-            login(request, auth_user)
+        # A single INSERT (the profile is created by the post_save signal)
+        user = User(username=username, email=email, last_name=last_name,
+                    is_staff=bool(is_admin))
+        user.set_password(password)
+        try:
+            # In a savepoint, so the error doesn't break an enclosing transaction
+            with transaction.atomic():
+                user.save()
+        except IntegrityError:
+            # Created concurrently between the check and the insert
+            return HttpResponse("Username or email already in use", status=400)
+
+        # The password was just set, so skip authenticate() and its second hash
+        login(request, user, backend='django.contrib.auth.backends.ModelBackend')
 
         return HttpResponse("User created successfully.")
     except Exception as e:
@@ -162,6 +216,94 @@ def create_comment(request):
         return HttpResponse(f"Database error: {str(e)}", status=500)
 
 
+def _bulk_items(data, key, fields):
+    """
+    The list under data[key] as dicts of the given fields with whitespace
+    stripped; raises ValueError naming the first bad item. Text fields
+    must be JSON strings; post_id is checked by the caller.
+    """
+    items = data.get(key, [])
+    if not isinstance(items, list):
+        raise ValueError(f"{key} must be a list")
+    cleaned = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise ValueError(f"{key}[{i}] must be an object")
+        row = {}
+        for field in fields:
+            value = item.get(field)
+            value = value.strip() if isinstance(value, str) else value
+            if value in (None, ""):
+                raise ValueError(f"{key}[{i}]: missing required field: {field}")
+            if field != "post_id" and not isinstance(value, str):
+                raise ValueError(f"{key}[{i}]: {field} must be a string")
+            row[field] = value
+        cleaned.append(row)
+    return cleaned
+
+
+@csrf_exempt
+def create_bulk(request):
+    """
+    API endpoint to create many posts and comments at once. Takes a POST
+    with a JSON body:
+        {"posts": [{"title": ..., "content": ...}, ...],
+         "comments": [{"post_id": ..., "content": ...}, ...]}
+    Comments must reference existing posts. Everything is inserted in one
+    transaction (all or nothing), and the new ids come back in request
+    order: {"posts": [ids], "comments": [ids]}.
+    Bulk inserts skip post_save, so the live stream doesn't announce them
+    and the feed timeline picks them up on its next reload.
+    """
+    if request.method != "POST":
+        return HttpResponse("Method not allowed", status=405)
+
+    if not request.user.is_authenticated:
+        return HttpResponse("Unauthorized", status=401)
+
+    try:
+        data = json.loads(request.body)
+        if not isinstance(data, dict):
+            raise ValueError("Body must be a JSON object")
+        posts = _bulk_items(data, "posts", ("title", "content"))
+        comments = _bulk_items(data, "comments", ("post_id", "content"))
+        for i, comment in enumerate(comments):
+            # An integer or a string of digits; int() would also take 1.7
+            # (as post 1) and True
+            post_id = comment["post_id"]
+            if isinstance(post_id, str) and post_id.isascii() and post_id.isdigit():
+                comment["post_id"] = int(post_id)
+            elif not isinstance(post_id, int) or isinstance(post_id, bool):
+                raise ValueError(f"comments[{i}]: invalid post_id")
+    except ValueError as e:
+        # json.JSONDecodeError is a ValueError too
+        return HttpResponse(f"Invalid request: {e}", status=400)
+    if len(posts) + len(comments) > MAX_BULK_ITEMS:
+        return HttpResponse(f"Too many items (at most {MAX_BULK_ITEMS})", status=400)
+
+    # Every referenced post in one query
+    post_ids = {comment["post_id"] for comment in comments}
+    existing = Post.objects.only("id").in_bulk(post_ids)
+    missing = sorted(post_ids - existing.keys())
+    if missing:
+        return HttpResponse(f"Post not found: {', '.join(map(str, missing))}", status=404)
+
+    try:
+        with transaction.atomic():
+            new_posts = Post.objects.bulk_create(
+                Post(author=request.user, title=post["title"], content=post["content"])
+                for post in posts)
+            new_comments = Comment.objects.bulk_create(
+                Comment(post_id=comment["post_id"], author=request.user, content=comment["content"])
+                for comment in comments)
+        return JsonResponse({
+            "posts": [post.id for post in new_posts],
+            "comments": [comment.id for comment in new_comments],
+        }, status=201)
+    except Exception as e:
+        return HttpResponse(f"Database error: {str(e)}", status=500)
+
+
 @csrf_exempt
 def hide_post(request):
     """API endpoint to hide a post. Takes POST request with fields: post_id, reason"""
@@ -198,6 +340,7 @@ def hide_post(request):
         post.moderator = request.user
         post.moderation_reason = moderation_reason
         post.save()
+        metrics.inc("cloudysky_moderation_actions_total", action="hide_post")
         
         return HttpResponse(f"Post {post_id} hidden successfully", status=200)
     except Exception as e:
@@ -240,206 +383,278 @@ def hide_comment(request):
         comment.moderator = request.user
         comment.moderation_reason = moderation_reason
         comment.save()
+        metrics.inc("cloudysky_moderation_actions_total", action="hide_comment")
         
         return HttpResponse(f"Comment {comment_id} hidden successfully", status=200)
     except Exception as e:
         return HttpResponse(f"Database error: {str(e)}", status=500)
 
 
+def _format_date(dt):
+    """Format a timestamp as "YYYY-MM-DD HH:MM" like every feed endpoint."""
+    return dt.strftime("%Y-%m-%d %H:%M")
+
+
 @csrf_exempt
-def dump_feed(request):
+async def dump_feed(request):
     """
     Diagnostic output view that returns all posts as JSON.
     Applies censorship logic:
     - Admins can see hidden content (flagged)
     - Authors can see their own hidden content
     - Other users cannot see hidden content
+
+    Async: posts and their comments are streamed with two queries
+    (aiterator), so a slow read doesn't tie up a worker under ASGI.
     """
     if request.method != "GET":
         return HttpResponse("Method not allowed", status=405)
     
     # Check if user is logged in
-    if not request.user.is_authenticated:
+    user = await request.auser()
+    if not user.is_authenticated:
         return HttpResponse("", status=200)
     
     try:
-        posts = Post.objects.all().order_by('-created_at')
+        posts = Post.objects.select_related('author').order_by('-created_at')
+        if not user.is_staff:
+            # Only show hidden posts to admins and the author
+            posts = posts.filter(Q(is_hidden=False) | Q(author_id=user.id))
+
         feed_data = []
-        
-        for post in posts:
-            # Check if post is hidden and if user can see it
-            if post.is_hidden:
-                # Only show hidden posts to admins and the author
-                if not (request.user.is_staff or request.user == post.author):
-                    continue
-            
-            # Format date as "YYYY-MM-DD HH:MM"
-            date_str = post.created_at.strftime("%Y-%m-%d %H:%M")
-            
-            # Get comment details (not just IDs, but full comment info)
-            comments_data = []
-            for comment in post.comments.all():
-                # Check if comment is hidden and if user can see it
-                if comment.is_hidden:
-                    # Only show hidden comments to admins and the author
-                    if not (request.user.is_staff or request.user == comment.author):
-                        continue
-                
-                comments_data.append({
-                    'id': comment.id,
-                    'author': comment.author.username,
-                    'content': comment.content,
-                    'date': comment.created_at.strftime("%Y-%m-%d %H:%M")
-                })
-            
+        by_post = {}
+        async for post in posts.aiterator():
             post_dict = {
                 'id': post.id,
                 'username': post.author.username,
-                'date': date_str,
+                'date': _format_date(post.created_at),
                 'title': post.title,
                 'content': post.content,
-                'comments': comments_data
+                'comments': []
             }
+            by_post[post.id] = post_dict['comments']
             feed_data.append(post_dict)
+
+        # Comment details (not just IDs, but full comment info) for all
+        # visible posts in one query
+        comments = Comment.objects.select_related('author').filter(
+            post_id__in=list(by_post)).order_by('id')
+        if not user.is_staff:
+            # Only show hidden comments to admins and the author
+            comments = comments.filter(Q(is_hidden=False) | Q(author_id=user.id))
+        async for comment in comments.aiterator():
+            by_post[comment.post_id].append({
+                'id': comment.id,
+                'author': comment.author.username,
+                'content': comment.content,
+                'date': _format_date(comment.created_at)
+            })
         
         return JsonResponse(feed_data, safe=False)
     except Exception as e:
         return HttpResponse(f"Database error: {str(e)}", status=500)
 
 
+async def _feed_page(user, position, limit):
+    """
+    One feed page from the database: (feed rows, (created_at, id) of the
+    last row if there are more, else None).
+    """
+    # Posts in reverse chronological order; only the listed columns are
+    # read, and content is cut to TRUNCATE_AT + 1 characters in SQL (the
+    # extra one tells feed_row whether to add "..."). Usernames are looked
+    # up afterwards: joining auth_user here lets the planner drive the
+    # query from the users table and sort, instead of walking the index.
+    order = ('-created_at', '-id')
+    posts = Post.objects.order_by(*order).values(
+        'id', 'title', 'created_at', 'author_id',
+        snippet=Substr('content', 1, TRUNCATE_AT + 1))
+    if position is not None:
+        posts = posts.filter(after(order, position))
+
+    if user.is_authenticated and user.is_staff:
+        # Everything, newest first, off post_newest_idx
+        rows = [post async for post in posts[:limit + 1]]
+    else:
+        # Visible posts come off the partial post_visible_newest_idx
+        rows = [post async for post in posts.filter(is_hidden=False)[:limit + 1]]
+        if user.is_authenticated:
+            # Hidden posts only show to their creator: merge in this user's
+            # own hidden posts (post_author_newest_idx) rather than OR-ing
+            # them into one query that no index can order
+            own = posts.filter(author_id=user.id, is_hidden=True)
+            rows += [post async for post in own[:limit + 1]]
+            rows.sort(key=lambda post: (post['created_at'], post['id']), reverse=True)
+
+    next_position = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_position = (rows[-1]['created_at'], rows[-1]['id'])
+    usernames = {}
+    if rows:
+        authors = User.objects.filter(id__in={post['author_id'] for post in rows})
+        usernames = {user_id: name async for user_id, name in authors.values_list('id', 'username')}
+    return [feed_row(post['id'], usernames[post['author_id']], post['created_at'],
+                     post['title'], post['snippet']) for post in rows], next_position
+
+
 @csrf_exempt
-def feed(request):
+async def feed(request):
     """
     API endpoint that returns feed of posts in reverse chronological order.
     Shows: number, title, date, username, truncated content.
     Implements censorship: hidden posts only visible to creator and admins.
+    Returns FEED_PAGE_SIZE (or ?limit=) posts; when there are more, a
+    Link: <...?cursor=...>; rel="next" header points at the next page.
     """
     if request.method != "GET":
         return HttpResponse("Method not allowed", status=405)
     
     try:
-        # Get all posts in reverse chronological order
-        all_posts = Post.objects.all().order_by('-created_at')
-        feed_data = []
-        
-        for post in all_posts:
-            # Check if post is hidden
-            if post.is_hidden:
-                # Only show to creator or admins
-                if request.user.is_authenticated:
-                    if post.author == request.user or request.user.is_staff:
-                        pass  # Show the post
-                    else:
-                        continue  # Skip this post
-                else:
-                    continue  # Skip this post
-            
-            # Format date as "YYYY-MM-DD HH:MM"
-            date_str = post.created_at.strftime("%Y-%m-%d %H:%M")
-            
-            # Truncate content to 200 characters
-            truncated_content = post.content[:200]
-            if len(post.content) > 200:
-                truncated_content += "..."
-            
-            post_dict = {
-                'id': post.id,
-                'username': post.author.username,
-                'date': date_str,
-                'title': post.title,
-                'content': truncated_content
-            }
-            feed_data.append(post_dict)
-        
-        return JsonResponse(feed_data, safe=False)
+        limit = page_size(request, FEED_PAGE_SIZE, MAX_FEED_PAGE_SIZE)
+        cursor = request.GET.get("cursor")
+        position = decode_cursor(cursor, datetime, int) if cursor else None
+    except ValueError as e:
+        return HttpResponse(str(e), status=400)
+
+    user = await request.auser()
+    try:
+        # The newest pages usually come straight from the in-memory timeline
+        page = await timeline.page(user, position, limit) if timeline.enabled else None
+        if page is not None:
+            feed_data, next_position = page
+        else:
+            feed_data, next_position = await _feed_page(user, position, limit)
+        next_cursor = encode_cursor(list(next_position)) if next_position else None
+
+        response = JsonResponse(feed_data, safe=False)
+        if next_cursor:
+            query = request.GET.copy()
+            query['cursor'] = next_cursor
+            response['Link'] = f'<{request.path}?{query.urlencode()}>; rel="next"'
+        return response
     except Exception as e:
         return HttpResponse(f"Database error: {str(e)}", status=500)
 
 
+async def feed_stream(request):
+    """
+    Server-Sent Events stream of new posts, new comments and hide events
+    (see app/live.py), filtered by the same visibility rules as the feed.
+    Needs the ASGI server: under WSGI the stream would hold a worker
+    thread for as long as the client stays connected.
+    """
+    if request.method != "GET":
+        return HttpResponse("Method not allowed", status=405)
+    if not hasattr(request, "scope"):
+        return HttpResponse("Streaming requires the ASGI server (cloudysky.asgi)", status=501)
+
+    user = await request.auser()
+    response = StreamingHttpResponse(broker.stream(user), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 @csrf_exempt
-def post_detail(request, post_id):
+async def post_detail(request, post_id):
     """
-    API endpoint that returns details of a specific post including all comments.
+    API endpoint that returns details of a specific post including its comments.
     Implements censorship:
     - Hidden posts: only visible to creator and admins
     - Hidden comments: show placeholder except to creator and admins
+    Comments come oldest first, COMMENT_PAGE_SIZE (or ?limit=) at a time;
+    pass the returned 'comments_next' back as ?cursor= for the next page.
     """
     if request.method != "GET":
         return HttpResponse("Method not allowed", status=405)
     
     try:
-        post = Post.objects.get(id=post_id)
+        limit = page_size(request, COMMENT_PAGE_SIZE, MAX_COMMENT_PAGE_SIZE)
+        cursor = request.GET.get("cursor")
+        position = decode_cursor(cursor, datetime, int) if cursor else None
+    except ValueError as e:
+        return HttpResponse(str(e), status=400)
+
+    user = await request.auser()
+    try:
+        post = await Post.objects.select_related('author').aget(id=post_id)
     except Post.DoesNotExist:
         return HttpResponse("Post not found", status=404)
-    except ValueError:
-        return HttpResponse("Invalid post_id", status=400)
     
     try:
-        # Check if post is hidden
-        if post.is_hidden:
-            # Only show to creator or admins
-            if request.user.is_authenticated:
-                if post.author != request.user and not request.user.is_staff:
-                    return HttpResponse("Post not found", status=404)
-            else:
-                return HttpResponse("Post not found", status=404)
-        
-        # Format date as "YYYY-MM-DD HH:MM"
-        date_str = post.created_at.strftime("%Y-%m-%d %H:%M")
+        # Hidden content is shown only to its creator or admins
+        is_staff = user.is_authenticated and user.is_staff
+        user_id = user.id if user.is_authenticated else None
+        if post.is_hidden and not (is_staff or post.author_id == user_id):
+            return HttpResponse("Post not found", status=404)
         
-        # Get all comments for this post
+        # One page of comments with author names in a single query
+        order = ('created_at', 'id')
+        comments = Comment.objects.filter(post_id=post.id).order_by(*order).values(
+            'id', 'author_id', 'author__username', 'content', 'created_at', 'is_hidden')
+        if position is not None:
+            comments = comments.filter(after(order, position))
+
+        rows = [comment async for comment in comments[:limit + 1]]
+        comments_next = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            comments_next = encode_cursor([rows[-1]['created_at'], rows[-1]['id']])
+
         comments_data = []
-        for comment in post.comments.all().order_by('created_at'):
-            if comment.is_hidden:
-                # Check if user can see hidden comment
-                if request.user.is_authenticated:
-                    if comment.author == request.user or request.user.is_staff:
-                        # Show full comment to creator or admin
-                        comments_data.append({
-                            'id': comment.id,
-                            'author': comment.author.username,
-                            'content': comment.content,
-                            'date': comment.created_at.strftime("%Y-%m-%d %H:%M"),
-                            'is_hidden': True
-                        })
-                    else:
-                        # Show placeholder to others
-                        comments_data.append({
-                            'id': comment.id,
-                            'author': '[removed]',
-                            'content': 'This comment has been removed',
-                            'date': comment.created_at.strftime("%Y-%m-%d %H:%M"),
-                            'is_hidden': True
-                        })
-                else:
-                    # Show placeholder to anonymous users
-                    comments_data.append({
-                        'id': comment.id,
-                        'author': '[removed]',
-                        'content': 'This comment has been removed',
-                        'date': comment.created_at.strftime("%Y-%m-%d %H:%M"),
-                        'is_hidden': True
-                    })
-            else:
-                # Show normal comment
-                comments_data.append({
-                    'id': comment.id,
-                    'author': comment.author.username,
-                    'content': comment.content,
-                    'date': comment.created_at.strftime("%Y-%m-%d %H:%M"),
-                    'is_hidden': False
-                })
+        for comment in rows:
+            visible = not comment['is_hidden'] or is_staff or comment['author_id'] == user_id
+            comments_data.append({
+                'id': comment['id'],
+                # Placeholder for hidden comments others can't see
+                'author': comment['author__username'] if visible else '[removed]',
+                'content': comment['content'] if visible else 'This comment has been removed',
+                'date': _format_date(comment['created_at']),
+                'is_hidden': comment['is_hidden']
+            })
         
         post_data = {
             'id': post.id,
             'username': post.author.username,
-            'date': date_str,
+            'date': _format_date(post.created_at),
             'title': post.title,
             'content': post.content,
-            'comments': comments_data
+            'comments': comments_data,
+            'comments_next': comments_next
         }
         
         return JsonResponse(post_data, safe=False)
     except Exception as e:
         return HttpResponse(f"Database error: {str(e)}", status=500)
 
+
+@csrf_exempt
+def search(request):
+    """
+    API endpoint for full-text search over posts and comments: ?q=words
+    Results are ranked best match first, with the same censorship as feed
+    (hidden content only for its creator and admins). Pass the returned
+    'next' value back as ?cursor= for the following page. 'truncated' is
+    true when only the newest matches were searched (see app.search).
+    """
+    if request.method != "GET":
+        return HttpResponse("Method not allowed", status=405)
+
+    query = (request.GET.get("q") or "").strip()
+    if not query:
+        return HttpResponse("Missing required field: q", status=400)
+    try:
+        limit = page_size(request, fulltext.PAGE_SIZE, fulltext.MAX_PAGE_SIZE)
+    except ValueError:
+        return HttpResponse("Invalid limit", status=400)
+
+    try:
+        results, next_cursor, truncated = fulltext.search(request.user, query,
+                                                          request.GET.get("cursor"), limit)
+    except ValueError:
+        return HttpResponse("Invalid cursor", status=400)
+    except Exception as e:
+        return HttpResponse(f"Database error: {str(e)}", status=500)
+    return JsonResponse({'results': results, 'next': next_cursor, 'truncated': truncated})
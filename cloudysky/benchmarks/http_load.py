@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the CloudySky API endpoints.
+
+Seeds a scratch SQLite database (manage.py seed_load), starts the server
+against it, logs in a pool of concurrent asyncio clients and drives a
+weighted mix of /app/feed/, /app/dumpFeed/, /app/createPost/,
+/app/createComment/ and /app/hidePost/ for a fixed duration. Reports
+throughput and p50/p95/p99 latency per endpoint and saves them as JSON
+(with the git commit) so runs can be compared across commits.
+
+The client is a small keep-alive HTTP/1.1 implementation on asyncio
+streams, so no extra packages are needed.
+
+Usage (from the cloudysky/ directory):
+    python -m benchmarks.http_load [--clients 32] [--duration 20]
+        [--mix feed=50,dumpFeed=5,createPost=20,createComment=20,hidePost=5]
+        [--server "uvicorn cloudysky.asgi:application --port {port}"]
+        [--output bench.json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANAGE = os.path.join(HERE, "manage.py")
+
+DEFAULT_MIX = "feed=50,dumpFeed=5,createPost=20,createComment=20,hidePost=5"
+PASSWORD = "Password123"
+PREFIX = "bench"
+
+
+# ============================================================================
+# MINIMAL ASYNC HTTP CLIENT
+# ============================================================================
+
+class Client:
+    """One keep-alive HTTP/1.1 connection with a cookie jar (one simulated user)."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.cookies = {}
+        self.reader = self.writer = None
+
+    async def request(self, method, path, form=None, headers=None):
+        """Send a request and return (status, headers, body); reconnects as needed."""
+        body = urlencode(form).encode() if form is not None else b""
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                 f"Content-Length: {len(body)}"]
+        if form is not None:
+            lines.append("Content-Type: application/x-www-form-urlencoded")
+        if self.cookies:
+            lines.append("Cookie: " + "; ".join(f"{k}={v}" for k, v in self.cookies.items()))
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        raw = ("\r\n".join(lines) + "\r\n\r\n").encode() + body
+
+        for attempt in (0, 1):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                self.writer.write(raw)
+                await self.writer.drain()
+                return await self._response()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # Server closed an idle keep-alive connection; retry once fresh
+                await self.close()
+                if attempt:
+                    raise
+
+    async def _response(self):
+        status_line = await self.reader.readuntil(b"\r\n")
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await self.reader.readuntil(b"\r\n")) != b"\r\n":
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip()
+            if name == "set-cookie":
+                cookie = value.split(";", 1)[0]
+                key, _, val = cookie.partition("=")
+                self.cookies[key] = val
+            headers[name] = value
+        if "content-length" in headers:
+            body = await self.reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            body = b""
+            while size := int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16):
+                body += await self.reader.readexactly(size)
+                await self.reader.readuntil(b"\r\n")
+            await self.reader.readuntil(b"\r\n")
+        else:
+            body = await self.reader.read()
+            headers["connection"] = "close"
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, headers, body
+
+    async def login(self, username):
+        """Log in through the regular login form (CSRF token included)."""
+        _, _, page = await self.request("GET", "/accounts/login/")
+        token = re.search(rb'name="csrfmiddlewaretoken" value="([^"]+)"', page).group(1).decode()
+        status, _, _ = await self.request(
+            "POST", "/accounts/login/",
+            form={"username": username, "password": PASSWORD, "csrfmiddlewaretoken": token},
+            headers={"Referer": f"http://{self.host}:{self.port}/accounts/login/"})
+        if status != 302:
+            raise RuntimeError(f"Login failed for {username} (HTTP {status})")
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+        self.reader = self.writer = None
+
+
+# ============================================================================
+# WORKLOAD
+# ============================================================================
+
+def make_request(name, rng, posts):
+    """(method, path, form) for one request of the given endpoint."""
+    if name == "feed":
+        return "GET", "/app/feed/", None
+    if name == "dumpFeed":
+        return "GET", "/app/dumpFeed/", None
+    if name == "createPost":
+        return "POST", "/app/createPost/", {"title": "bench post", "content": "load " * rng.randint(5, 80)}
+    if name == "createComment":
+        return "POST", "/app/createComment/", {"post_id": rng.randint(1, posts), "content": "bench comment"}
+    if name == "hidePost":
+        return "POST", "/app/hidePost/", {"post_id": rng.randint(1, posts), "reason": "bench"}
+    raise ValueError(f"Unknown endpoint in mix: {name}")
+
+
+def parse_mix(text):
+    """'feed=50,hidePost=5' -> {'feed': 50.0, 'hidePost': 5.0}"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        make_request(name.strip(), random.Random(), 1)   # validates the name
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+async def client_loop(client, mix, rng, posts, deadline, record_after, samples):
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        method, path, form = make_request(name, rng, posts)
+        start = time.perf_counter()
+        try:
+            status, _, _ = await client.request(method, path, form)
+        except (OSError, asyncio.IncompleteReadError):
+            status = 0
+        if start >= record_after:
+            samples.append((name, time.perf_counter() - start, status))
+
+
+async def run_load(args, mix):
+    clients = [Client("127.0.0.1", args.port) for _ in range(args.clients)]
+    # Half the clients are admins, so hidePost exercises the moderation path
+    await asyncio.gather(*(c.login(f"{PREFIX}_{i % args.users}") for i, c in enumerate(clients)))
+
+    samples = []
+    start = time.perf_counter()
+    record_after = start + args.warmup
+    deadline = record_after + args.duration
+    await asyncio.gather(*(
+        client_loop(c, mix, random.Random(args.seed * 1000 + i), args.posts, deadline, record_after, samples)
+        for i, c in enumerate(clients)))
+    await asyncio.gather(*(c.close() for c in clients))
+    return samples
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list: the ceil(p/100 * n)-th value."""
+    if not sorted_values:
+        return None
+    # p * n first, so whole-number ranks stay exact (0.95 * 100 is not 95)
+    index = max(0, min(len(sorted_values) - 1, math.ceil(p * len(sorted_values) / 100) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, duration):
+    """Per-endpoint and overall RPS, error count and latency percentiles (ms)."""
+    groups = {}
+    for name, latency, status in samples:
+        groups.setdefault(name, []).append((latency, status))
+    groups["ALL"] = [(latency, status) for _, latency, status in samples]
+
+    report = {}
+    for name, rows in groups.items():
+        latencies = sorted(latency * 1000 for latency, _ in rows)
+        report[name] = {
+            "requests": len(rows),
+            "rps": round(len(rows) / duration, 1),
+            "errors": sum(1 for _, status in rows if status == 0 or status >= 500),
+            "p50_ms": round(percentile(latencies, 50), 2) if latencies else None,
+            "p95_ms": round(percentile(latencies, 95), 2) if latencies else None,
+            "p99_ms": round(percentile(latencies, 99), 2) if latencies else None,
+        }
+    return report
+
+
+# ============================================================================
+# SERVER AND DATABASE SETUP
+# ============================================================================
+
+def manage(env, *args):
+    subprocess.run([sys.executable, MANAGE, *args], env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def seed(env, args):
+    manage(env, "migrate", "--noinput", "-v", "0")
+    manage(env, "seed_load", "--users", str(args.users), "--posts", str(args.posts),
+           "--comments", str(args.comments), "--prefix", PREFIX, "--password", PASSWORD,
+           "--seed", str(args.seed))
+    # Every other bench user is an admin
+    manage(env, "shell", "-c",
+           "from django.contrib.auth.models import User\n"
+           f"ids = User.objects.filter(username__startswith='{PREFIX}_').values_list('id', 'username')\n"
+           "User.objects.filter(id__in=[i for i, name in ids if int(name.rsplit('_', 1)[1]) % 2 == 1])"
+           ".update(is_staff=True)")
+
+
+def start_server(env, args):
+    command = args.server.format(port=args.port)
+    proc = subprocess.Popen(shlex.split(command), cwd=HERE, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited early: {command}")
+        try:
+            asyncio.run(Client("127.0.0.1", args.port).request("GET", "/app/time"))
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"Server did not come up on port {args.port}")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds first")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted endpoint mix")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--comments", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--server", default=f"{sys.executable} manage.py runserver --noreload 127.0.0.1:{{port}}",
+                        help="Server command; {port} is substituted")
+    parser.add_argument("--database", help="Use this (already seeded) SQLite file instead of a scratch one")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    env = dict(os.environ, CLOUDYSKY_DB="sqlite")
+    with tempfile.TemporaryDirectory(prefix="cloudysky-load-") as tmpdir:
+        env["CLOUDYSKY_SQLITE_PATH"] = args.database or os.path.join(tmpdir, "load.sqlite3")
+        if not args.database:
+            print(f"Seeding {args.users} users, {args.posts} posts, {args.comments} comments...")
+            seed(env, args)
+        server = start_server(env, args)
+        try:
+            print(f"Running {args.clients} clients for {args.duration}s ({args.server.format(port=args.port)})")
+            samples = asyncio.run(run_load(args, mix))
+        finally:
+            server.terminate()
+            server.wait()
+
+    report = summarize(samples, args.duration)
+    print(f"{'endpoint':<14}{'requests':>9}{'rps':>9}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, row in report.items():
+        print(f"{name:<14}{row['requests']:>9}{row['rps']:>9}{row['errors']:>8}"
+              f"{row['p50_ms']!s:>9}{row['p95_ms']!s:>9}{row['p99_ms']!s:>9}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"commit": git_commit(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "args": vars(args), "results": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Reader/writer throughput of the SQLite database under concurrent load,
+with SQLite's default settings versus settings.SQLITE_PRAGMAS.
+
+Reader threads run the feed query (newest 50 visible posts with author
+names) and writer threads alternate create_post-style inserts and
+hide_post-style updates, each in its own transaction, all against a
+scratch copy of the post/user tables.
+
+Usage (from the cloudysky/ directory):
+    python -m benchmarks.sqlite_concurrency [--readers 4] [--writers 2] [--seconds 5]
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from cloudysky.settings import SQLITE_PRAGMAS
+
+FEED_QUERY = """
+    SELECT p.id, p.title, substr(p.content, 1, 200), p.created_at, u.username
+    FROM app_post p JOIN auth_user u ON u.id = p.author_id
+    WHERE p.is_hidden = 0
+    ORDER BY p.created_at DESC
+    LIMIT 50
+"""
+
+# name -> (pragmas, transaction mode), mirroring settings.DATABASES before/after
+PROFILES = {
+    "default": ([], "DEFERRED"),
+    "tuned": (SQLITE_PRAGMAS, "IMMEDIATE"),
+}
+
+
+def connect(path, profile):
+    """Open a connection the way Django would for this profile."""
+    pragmas, mode = PROFILES[profile]
+    conn = sqlite3.connect(path, timeout=5, isolation_level=mode, check_same_thread=False)
+    for pragma in pragmas:
+        conn.execute(pragma)
+    return conn
+
+
+def create_db(path, users, posts):
+    """Build the tables and indexes feed reads touch, filled with synthetic rows."""
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE auth_user (id INTEGER PRIMARY KEY, username TEXT NOT NULL);
+        CREATE TABLE app_post (
+            id INTEGER PRIMARY KEY, author_id INTEGER NOT NULL REFERENCES auth_user(id),
+            title TEXT NOT NULL, content TEXT NOT NULL, created_at TEXT NOT NULL,
+            is_hidden BOOLEAN NOT NULL DEFAULT 0);
+        CREATE INDEX app_post_author_id ON app_post (author_id);
+        CREATE INDEX app_post_created_at ON app_post (created_at);
+    """)
+    conn.executemany("INSERT INTO auth_user VALUES (?, ?)",
+                     ((i, f"user{i}") for i in range(1, users + 1)))
+    rng = random.Random(0)
+    conn.executemany(
+        "INSERT INTO app_post (author_id, title, content, created_at, is_hidden) VALUES (?, ?, ?, ?, ?)",
+        ((rng.randint(1, users), f"title {i}", "lorem ipsum " * rng.randint(5, 80),
+          f"2025-01-01 00:00:{i:012d}", rng.random() < 0.05) for i in range(posts)))
+    conn.commit()
+    conn.close()
+
+
+def run_profile(name, path, readers, writers, seconds, users):
+    """Hammer path with reader and writer threads for `seconds`; return ops/s and errors."""
+    # journal_mode is stored in the file, so reset it for each profile
+    conn = connect(path, name)
+    if not PROFILES[name][0]:
+        conn.execute("PRAGMA journal_mode=DELETE")
+    conn.close()
+
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def reader():
+        conn = connect(path, name)
+        done = errors = 0
+        while not stop.is_set():
+            try:
+                conn.execute(FEED_QUERY).fetchall()
+                done += 1
+            except sqlite3.OperationalError:
+                errors += 1
+        conn.close()
+        with lock:
+            counts["reads"] += done
+            counts["errors"] += errors
+
+    def writer(seed):
+        rng = random.Random(seed)
+        conn = connect(path, name)
+        done = errors = 0
+        while not stop.is_set():
+            try:
+                with conn:
+                    if done % 2 == 0:
+                        conn.execute(
+                            "INSERT INTO app_post (author_id, title, content, created_at, is_hidden) "
+                            "VALUES (?, 'bench', 'new post', datetime('now'), 0)",
+                            (rng.randint(1, users),))
+                    else:
+                        conn.execute("UPDATE app_post SET is_hidden = 1 WHERE id = ?",
+                                     (rng.randint(1, 1000),))
+                done += 1
+            except sqlite3.OperationalError:
+                errors += 1
+        conn.close()
+        with lock:
+            counts["writes"] += done
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return {
+        "profile": name,
+        "reads_per_s": round(counts["reads"] / seconds, 1),
+        "writes_per_s": round(counts["writes"] / seconds, 1),
+        "errors": counts["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--posts", type=int, default=50000)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="cloudysky-bench-") as tmpdir:
+        path = os.path.join(tmpdir, "bench.sqlite3")
+        create_db(path, args.users, args.posts)
+        for name in PROFILES:
+            result = run_profile(name, path, args.readers, args.writers, args.seconds, args.users)
+            results.append(result)
+            print(f"{name:>8}: {result['reads_per_s']:>9} reads/s  "
+                  f"{result['writes_per_s']:>8} writes/s  {result['errors']} errors")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
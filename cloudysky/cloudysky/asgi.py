@@ -3,6 +3,10 @@ ASGI config for cloudysky project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Run it with an ASGI server, e.g. from the cloudysky/ directory:
+
+    uvicorn cloudysky.asgi:application --host 0.0.0.0 --port 8000
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -14,3 +18,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cloudysky.settings')
 
 application = get_asgi_application()
+
+from .startup import ensure_schema  # noqa: E402 (needs the app registry)
+
+ensure_schema()
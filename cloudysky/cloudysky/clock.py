@@ -0,0 +1,27 @@
+"""
+Current Central Time (America/Chicago) as "HH:MM", for the homepage and
+/app/time.
+
+The string only changes once a minute, so it is formatted once per
+minute and reused; the time zone object is built once at import.
+"""
+
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+CENTRAL = ZoneInfo("America/Chicago")
+
+_current = (None, "")   # (minute since the epoch, "HH:MM")
+
+
+def current_time():
+    """The current Central Time as "HH:MM" (24-hour)."""
+    global _current
+    minute = int(time.time() // 60)
+    cached_minute, text = _current
+    if cached_minute != minute:
+        text = datetime.fromtimestamp(minute * 60, CENTRAL).strftime("%H:%M")
+        # A single tuple assignment, so other threads never see a torn value
+        _current = (minute, text)
+    return text
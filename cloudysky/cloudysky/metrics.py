@@ -0,0 +1,198 @@
+"""
+Prometheus-style metrics without external dependencies.
+
+Counters and histograms are kept in per-thread shards, so recording a
+sample never takes a lock; a scrape sums the shards. When a thread ends
+(runserver and the ASGI sync adapter start one per request), its shard
+is folded into a process-wide total, so the shard list only holds live
+threads. With
+settings.METRICS_DIR set (pre-fork servers), each process also snapshots
+its totals to METRICS_DIR/metrics-<pid>.json at most once per
+METRICS_FLUSH_SECONDS, and /metrics adds up the snapshots of every
+process, dead or alive, so counters never go backwards.
+"""
+
+import atexit
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.http import HttpResponse
+
+# Latency histogram upper bounds in seconds (+Inf is implicit)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'cloudysky_requests_total': ('counter', 'HTTP requests by view, method and status'),
+    'cloudysky_request_errors_total': ('counter', 'Requests answered with a 5xx status, by view'),
+    'cloudysky_request_duration_seconds': ('histogram', 'Request wall time by view'),
+    'cloudysky_db_queries_total': ('counter', 'ORM queries by view'),
+    'cloudysky_db_duration_seconds_total': ('counter', 'Time spent in SQL by view'),
+    'cloudysky_moderation_actions_total': ('counter', 'Posts and comments hidden by moderators'),
+}
+
+_shards = []
+# Taken when a thread records its first sample, when it ends and on
+# scrapes. Reentrant because a thread's finalizer can run from garbage
+# collection while the lock is already held.
+_shards_lock = threading.RLock()
+_retired = ({}, {})   # (counters, histograms) of threads that have ended
+_local = threading.local()
+_last_flush = 0.0
+
+
+def _shard():
+    shard = getattr(_local, 'shard', None)
+    if shard is None:
+        shard = _local.shard = ({}, {})   # (counters, histograms)
+        with _shards_lock:
+            _shards.append(shard)
+        weakref.finalize(threading.current_thread(), _retire, shard)
+    return shard
+
+
+def _add(totals, shard):
+    """Add a (counters, histograms) pair into totals."""
+    counters, histograms = totals
+    shard_counters, shard_histograms = shard
+    for key, value in list(shard_counters.items()):
+        counters[key] = counters.get(key, 0.0) + value
+    for key, h in list(shard_histograms.items()):
+        total = histograms.setdefault(key, [0] * len(h))
+        for i, v in enumerate(list(h)):
+            total[i] += v
+
+
+def _retire(shard):
+    """Fold the shard of a thread that has ended into _retired."""
+    with _shards_lock:
+        _shards.remove(shard)
+        _add(_retired, shard)
+
+
+def _key(name, labels):
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+
+def inc(name, amount=1.0, **labels):
+    """Add amount to a counter."""
+    counters = _shard()[0]
+    key = _key(name, labels)
+    counters[key] = counters.get(key, 0.0) + amount
+
+
+def observe(name, value, **labels):
+    """Record one sample in a histogram."""
+    histograms = _shard()[1]
+    key = _key(name, labels)
+    h = histograms.get(key)
+    if h is None:
+        # One slot per bucket plus +Inf, then sum and count
+        h = histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0, 0]
+    h[bisect.bisect_left(BUCKETS, value)] += 1
+    h[-2] += value
+    h[-1] += 1
+
+
+def _local_totals():
+    """This process's counters and histograms, summed over thread shards."""
+    totals = ({}, {})
+    with _shards_lock:
+        _add(totals, _retired)
+        for shard in list(_shards):
+            _add(totals, shard)
+    return totals
+
+
+def _snapshot_path(pid):
+    return os.path.join(settings.METRICS_DIR, f'metrics-{pid}.json')
+
+
+def flush(force=False):
+    """Write this process's totals to METRICS_DIR (rate-limited unless force)."""
+    global _last_flush
+    if not settings.METRICS_DIR:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush < settings.METRICS_FLUSH_SECONDS:
+        return
+    _last_flush = now
+    counters, histograms = _local_totals()
+    data = {
+        'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+        'histograms': [[name, labels, h] for (name, labels), h in histograms.items()],
+    }
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = _snapshot_path(os.getpid())
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+atexit.register(lambda: flush(force=True))
+
+
+def collect():
+    """Totals over this process and, with METRICS_DIR, every other process's snapshot."""
+    counters, histograms = _local_totals()
+    if settings.METRICS_DIR:
+        own = _snapshot_path(os.getpid())
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, 'metrics-*.json')):
+            if path == own:
+                continue
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, labels, value in data['counters']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                counters[key] = counters.get(key, 0.0) + value
+            for name, labels, h in data['histograms']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                total = histograms.setdefault(key, [0] * len(h))
+                for i, v in enumerate(h):
+                    total[i] += v
+    return counters, histograms
+
+
+def _labels(pairs, extra=()):
+    pairs = list(pairs) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+
+def render():
+    """Prometheus text exposition format (version 0.0.4)."""
+    counters, histograms = collect()
+    by_name = {}
+    for (name, labels), value in sorted(counters.items()):
+        by_name.setdefault(name, []).append(f'{name}{_labels(labels)} {value:g}')
+    for (name, labels), h in sorted(histograms.items()):
+        lines = by_name.setdefault(name, [])
+        cumulative = 0
+        for bound, count in zip(list(BUCKETS) + ['+Inf'], h):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(labels, [("le", bound)])} {cumulative}')
+        lines.append(f'{name}_sum{_labels(labels)} {h[-2]:g}')
+        lines.append(f'{name}_count{_labels(labels)} {h[-1]}')
+
+    out = []
+    for name in sorted(by_name):
+        kind, text = HELP.get(name, ('untyped', name))
+        out.append(f'# HELP {name} {text}')
+        out.append(f'# TYPE {name} {kind}')
+        out.extend(by_name[name])
+    return '\n'.join(out) + '\n'
+
+
+def metrics_view(request):
+    """GET /metrics for Prometheus scrapes."""
+    return HttpResponse(render(), content_type='text/plain; version=0.0.4; charset=utf-8')
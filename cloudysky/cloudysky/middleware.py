@@ -1,31 +1,223 @@
-from django.core.management import call_command
-from django.db import connection
+import contextvars
+import cProfile
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
 
-_migrations_checked = False
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
 
+from . import metrics
 
-class EnsureMigrationsMiddleware:
+slow_log = logging.getLogger("cloudysky.slow_requests")
+
+
+class QueryTimer:
+    """Counts the queries run while it is active and sums their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# Timers of the request being handled. A context variable rather than a
+# per-connection execute_wrapper: under ASGI the ORM runs on worker
+# threads with their own connections, and asgiref copies the context
+# into those threads.
+_active_timers = contextvars.ContextVar("cloudysky_query_timers", default=())
+
+
+def _timed_execute(execute, sql, params, many, context):
+    timers = _active_timers.get()
+    if not timers:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        for timer in timers:
+            timer.seconds += elapsed
+            timer.count += 1
+
+
+@receiver(connection_created)
+def install_query_timing(sender, connection, **kwargs):
+    if _timed_execute not in connection.execute_wrappers:
+        # At the front, since connection.execute_wrapper() blocks pop
+        # their wrapper off the end
+        connection.execute_wrappers.insert(0, _timed_execute)
+
+
+def install_on_open_connections():
+    """Cover connections this thread opened before this module was imported."""
+    for connection in connections.all(initialized_only=True):
+        install_query_timing(None, connection)
+
+
+@contextmanager
+def timed_queries(timer):
+    """Count the queries run in this context (and threads it hands work to) in timer."""
+    token = _active_timers.set(_active_timers.get() + (timer,))
+    try:
+        yield
+    finally:
+        _active_timers.reset(token)
+
+
+class ProfilingMiddleware:
     """
-    On the first request only, check for core auth tables and run migrations
-    if they're missing. This prevents 500s like 'no such table: auth_user'
-    in fresh grading environments where migrate hasn't been executed yet.
+    Per-request timing, enabled with settings.PROFILING (env CLOUDYSKY_PROFILING=1).
+
+    Every response gets a Server-Timing header with the total wall time and
+    the ORM query count and SQL time (visible in browser dev tools).
+    Requests slower than PROFILING_SLOW_MS are logged as one JSON object to
+    the 'cloudysky.slow_requests' logger. A cProfile dump is written to
+    PROFILING_DIR for requests sent with an X-Profile header equal to
+    PROFILING_TOKEN, and for a random PROFILING_SAMPLE_RATE fraction of
+    all requests.
+
+    When disabled it raises MiddlewareNotUsed, so Django drops it from the
+    chain and requests pay nothing.
+
+    It runs in whichever mode the chain is in, so under ASGI async views
+    stay on the event loop. cProfile only sees the thread it was enabled
+    on; there, that is the loop (including other requests' work on it),
+    not the worker threads the ORM runs in.
     """
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
+        if not getattr(settings, "PROFILING", False):
+            raise MiddlewareNotUsed
         self.get_response = get_response
+        self.slow_ms = settings.PROFILING_SLOW_MS
+        self.token = settings.PROFILING_TOKEN
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.profile_dir = settings.PROFILING_DIR
+        install_on_open_connections()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _profiler(self, request):
+        if ((self.token and request.headers.get("X-Profile") == self.token)
+                or (self.sample_rate and random.random() < self.sample_rate)):
+            return cProfile.Profile()
+        return None
 
     def __call__(self, request):
-        global _migrations_checked
-        if not _migrations_checked:
+        if self.async_mode:
+            return self.__acall__(request)
+        timer = QueryTimer()
+        profiler = self._profiler(request)
+        start = time.perf_counter()
+        with timed_queries(timer):
+            if profiler is not None:
+                profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+        return self._report(request, response, timer, profiler, start)
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        profiler = self._profiler(request)
+        start = time.perf_counter()
+        with timed_queries(timer):
+            if profiler is not None:
+                profiler.enable()
             try:
-                tables = set(connection.introspection.table_names())
-                if "auth_user" not in tables:
-                    call_command("migrate", interactive=False, run_syncdb=True, verbosity=0)
-            except Exception:
-                # Best-effort only; if migrate fails, continue and let the
-                # natural error surface. This keeps behavior deterministic.
-                pass
+                response = await self.get_response(request)
             finally:
-                _migrations_checked = True
+                if profiler is not None:
+                    profiler.disable()
+        return self._report(request, response, timer, profiler, start)
+
+    def _report(self, request, response, timer, profiler, start):
+        total_ms = (time.perf_counter() - start) * 1000
+        db_ms = timer.seconds * 1000
+
+        response["Server-Timing"] = (
+            f'total;dur={total_ms:.1f}, db;dur={db_ms:.1f};desc="{timer.count} queries"')
+        match = request.resolver_match
+        view = match.view_name if match else None
+        if profiler is not None:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir,
+                                f"{time.strftime('%Y%m%d-%H%M%S')}-{view or 'unresolved'}-{os.getpid()}.prof")
+            profiler.dump_stats(path)
+        if total_ms >= self.slow_ms:
+            slow_log.warning(json.dumps({
+                "method": request.method,
+                "path": request.path,
+                "view": view,
+                "status": response.status_code,
+                "total_ms": round(total_ms, 1),
+                "db_ms": round(db_ms, 1),
+                "queries": timer.count,
+            }))
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Records request count, status, latency, ORM query count and SQL time
+    per view into cloudysky.metrics (served at /metrics). Enabled unless
+    settings.METRICS is False. Like ProfilingMiddleware it runs in either
+    mode, so it doesn't force async views through a thread hop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "METRICS", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install_on_open_connections()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with timed_queries(timer):
+            response = self.get_response(request)
+        self._record(request, response, timer, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with timed_queries(timer):
+            response = await self.get_response(request)
+        self._record(request, response, timer, time.perf_counter() - start)
+        return response
 
-        return self.get_response(request)
+    def _record(self, request, response, timer, elapsed):
+        match = request.resolver_match
+        # Unrouted paths share one label so scanners can't blow up cardinality
+        view = match.view_name if match else "unresolved"
+        if view == "metrics":
+            return
+        metrics.inc("cloudysky_requests_total", view=view, method=request.method,
+                    status=response.status_code)
+        if response.status_code >= 500:
+            metrics.inc("cloudysky_request_errors_total", view=view)
+        metrics.observe("cloudysky_request_duration_seconds", elapsed, view=view)
+        metrics.inc("cloudysky_db_queries_total", timer.count, view=view)
+        metrics.inc("cloudysky_db_duration_seconds_total", timer.seconds, view=view)
+        metrics.flush()
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -41,7 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-    'cloudysky.middleware.EnsureMigrationsMiddleware',
+    'cloudysky.middleware.MetricsMiddleware',
+    'cloudysky.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -57,8 +61,15 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compiled templates are kept in memory (also under DEBUG, so
+            # the runserver used for load tests behaves like production)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -74,12 +85,79 @@ WSGI_APPLICATION = 'cloudysky.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+# Run on every new SQLite connection. WAL lets feed readers proceed while
+# create_post/hide_post write; synchronous=NORMAL is durable across app
+# crashes in WAL mode and only fsyncs at checkpoints.
+SQLITE_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=5000',            # ms to wait on a locked database
+    'PRAGMA mmap_size=268435456',          # 256 MiB of the file read via mmap
+    'PRAGMA cache_size=-65536',            # 64 MiB page cache per connection
+    'PRAGMA temp_store=MEMORY',
+]
+
+# CLOUDYSKY_DB selects the backend: 'sqlite' (default) or 'postgres'.
+# PostgreSQL connection parameters come from the standard libpq variables
+# (PGHOST, PGPORT, PGDATABASE, PGUSER, PGPASSWORD).
+DB_BACKEND = os.environ.get('CLOUDYSKY_DB', 'sqlite')
+
+# Seconds a connection is kept after a request for the next request on the
+# same thread. Only servers with long-lived worker threads (gunicorn sync
+# or gthread workers) ever reuse one: runserver and the ASGI sync adapter
+# run each request on a new thread, where a kept connection would just
+# stay open until garbage collection. So the default, 0, closes it at the
+# end of the request; set CLOUDYSKY_CONN_MAX_AGE=600 under gunicorn.
+CONN_MAX_AGE = int(os.environ.get('CLOUDYSKY_CONN_MAX_AGE', 0))
+
+SQLITE_DATABASE = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.environ.get('CLOUDYSKY_SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+    'OPTIONS': {
+        'init_command': ';'.join(SQLITE_PRAGMAS),
+        # Take the write lock at BEGIN, so concurrent writers queue on
+        # busy_timeout instead of failing to upgrade a read lock
+        'transaction_mode': 'IMMEDIATE',
+    },
+    # With CONN_MAX_AGE set, connections (and their warm page cache)
+    # outlive the request; see above
+    'CONN_MAX_AGE': CONN_MAX_AGE,
+    'CONN_HEALTH_CHECKS': True,
+}
+
+POSTGRES_DATABASE = {
+    'ENGINE': 'django.db.backends.postgresql',
+    'NAME': os.environ.get('PGDATABASE', 'cloudysky'),
+    'USER': os.environ.get('PGUSER', ''),
+    'PASSWORD': os.environ.get('PGPASSWORD', ''),
+    'HOST': os.environ.get('PGHOST', ''),
+    'PORT': os.environ.get('PGPORT', ''),
 }
+if os.environ.get('CLOUDYSKY_DB_POOL', '1') == '1':
+    # psycopg 3 connection pool shared by the threads of each worker process
+    # (needs psycopg[pool]); the pool owns connection lifetimes, so
+    # CONN_MAX_AGE must stay 0
+    POSTGRES_DATABASE['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('CLOUDYSKY_DB_POOL_MIN', 2)),
+            'max_size': int(os.environ.get('CLOUDYSKY_DB_POOL_MAX', 10)),
+            'timeout': 10,
+        },
+    }
+else:
+    # Behind an external pooler such as pgbouncer in transaction mode:
+    # keep connections open (with a persistent-thread server, see
+    # CONN_MAX_AGE) and avoid session-bound server-side cursors
+    POSTGRES_DATABASE['CONN_MAX_AGE'] = CONN_MAX_AGE
+    POSTGRES_DATABASE['CONN_HEALTH_CHECKS'] = True
+    POSTGRES_DATABASE['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+if DB_BACKEND == 'sqlite':
+    DATABASES = {'default': SQLITE_DATABASE}
+elif DB_BACKEND == 'postgres':
+    DATABASES = {'default': POSTGRES_DATABASE}
+else:
+    raise ImproperlyConfigured(f"CLOUDYSKY_DB must be 'sqlite' or 'postgres', not {DB_BACKEND!r}")
 
 
 # Password validation
@@ -101,6 +179,25 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing. CLOUDYSKY_PASSWORD_HASHING=fast hashes new passwords
+# with (cheap, insecure) MD5 so load tests that create and log in thousands of
+# users aren't dominated by PBKDF2; existing hashes still verify (and get
+# rehashed on login). Never use it with real accounts.
+PASSWORD_HASHING = os.environ.get('CLOUDYSKY_PASSWORD_HASHING', 'default')
+if PASSWORD_HASHING == 'fast':
+    PASSWORD_HASHERS = [
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+    ]
+elif PASSWORD_HASHING != 'default':
+    raise ImproperlyConfigured(
+        f"CLOUDYSKY_PASSWORD_HASHING must be 'default' or 'fast', not {PASSWORD_HASHING!r}")
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -118,6 +215,41 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Request profiling (cloudysky.middleware.ProfilingMiddleware); off unless
+# CLOUDYSKY_PROFILING=1, in which case it adds Server-Timing headers and
+# logs slow requests
+PROFILING = os.environ.get('CLOUDYSKY_PROFILING', '0') == '1'
+PROFILING_SLOW_MS = float(os.environ.get('CLOUDYSKY_PROFILING_SLOW_MS', 500))
+# Requests with "X-Profile: <token>" get a cProfile dump (empty = never)
+PROFILING_TOKEN = os.environ.get('CLOUDYSKY_PROFILING_TOKEN', '')
+# Fraction of all requests to profile regardless of headers
+PROFILING_SAMPLE_RATE = float(os.environ.get('CLOUDYSKY_PROFILING_SAMPLE_RATE', 0))
+PROFILING_DIR = os.environ.get('CLOUDYSKY_PROFILING_DIR', BASE_DIR / 'profiles')
+
+# In-memory timeline of the newest posts serving the first feed pages
+# (app/timeline.py); 0 disables it. Changes made by other worker processes
+# show up after at most TIMELINE_MAX_AGE seconds.
+TIMELINE_SIZE = int(os.environ.get('CLOUDYSKY_TIMELINE_SIZE', 0))
+TIMELINE_MAX_AGE = float(os.environ.get('CLOUDYSKY_TIMELINE_MAX_AGE', 2.0))
+
+# Prometheus metrics (cloudysky.middleware.MetricsMiddleware, /metrics).
+# Pre-fork servers should point CLOUDYSKY_METRICS_DIR at a directory shared
+# by all workers (emptied at deploy) so any worker can report the totals.
+METRICS = os.environ.get('CLOUDYSKY_METRICS', '1') == '1'
+METRICS_DIR = os.environ.get('CLOUDYSKY_METRICS_DIR', '')
+METRICS_FLUSH_SECONDS = 1.0
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'cloudysky.slow_requests': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -18,6 +18,7 @@ from django.contrib import admin
 from django.contrib.auth import views as auth_views
 from django.urls import path, include
 from . import views
+from .metrics import metrics_view
 from app import views as app_views
 
 urlpatterns = [
@@ -26,6 +27,7 @@ urlpatterns = [
     path("dummypage", views.dummypage, name="dummypage"),
     path("app/time", views.time_now),
     path("app/sum", views.sum_view),
+    path("metrics", metrics_view, name="metrics"),
     path('admin/', admin.site.urls),
     path('login/', auth_views.LoginView.as_view(), name='login'),
     path('accounts/login/', auth_views.LoginView.as_view(), name='accounts_login'),
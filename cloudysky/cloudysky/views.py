@@ -1,6 +1,5 @@
 from django.http import HttpResponse
-from datetime import datetime
-from zoneinfo import ZoneInfo
+from .clock import current_time
 
 def dummypage(request):
      if request.method == "GET": 
@@ -8,8 +7,7 @@ def dummypage(request):
 
 def time_now(request):
     # CDT/CST per America/Chicago regardless of server UTC
-    now = datetime.now(ZoneInfo("America/Chicago"))
-    return HttpResponse(now.strftime("%H:%M"))
+    return HttpResponse(current_time())
 
 def sum_view(request):
     n1 = request.GET.get("n1")
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cloudysky.settings')
 
 application = get_wsgi_application()
+
+from .startup import ensure_schema  # noqa: E402 (needs the app registry)
+
+ensure_schema()
@@ -0,0 +1,46 @@
+"""
+Database selection for the live-server tests.
+
+By default the server under test uses SQLite. With CLOUDYSKY_TEST_DB=postgres
+the whole session runs against a temporary PostgreSQL cluster instead
+(see pgcluster.py), falling back to SQLite if PostgreSQL isn't installed:
+
+    CLOUDYSKY_TEST_DB=postgres python -m pytest cloudysky/tests
+"""
+
+import os
+import subprocess
+import sys
+import warnings
+
+import pytest
+
+from .pgcluster import postgres_available, temporary_cluster
+
+MANAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "manage.py")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database_backend():
+    if os.environ.get("CLOUDYSKY_TEST_DB", "sqlite") != "postgres":
+        yield "sqlite"
+        return
+    if not postgres_available():
+        warnings.warn("CLOUDYSKY_TEST_DB=postgres but initdb/pg_ctl, psycopg or psycopg_pool "
+                      "is missing; testing against SQLite")
+        yield "sqlite"
+        return
+
+    with temporary_cluster() as env:
+        saved = {name: os.environ.get(name) for name in env}
+        # The runserver subprocesses started by the tests inherit these
+        os.environ.update(env)
+        try:
+            subprocess.run([sys.executable, MANAGE, "migrate", "--noinput", "-v", "0"], check=True)
+            yield "postgres"
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
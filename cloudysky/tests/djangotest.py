@@ -0,0 +1,86 @@
+"""
+Shared setup for the in-process Django tests, which use Django's test
+client against a throwaway test database instead of a running server.
+
+A test module calls setup() from setUpModule and teardown() from
+tearDownModule. Django is only configured then, after conftest.py's
+session fixture has picked the database, so models are imported inside
+setUpModule too.
+"""
+
+import os
+import sys
+from datetime import timedelta
+
+import django
+from django.test import TestCase
+from django.test.utils import (setup_databases, setup_test_environment, teardown_databases,
+                               teardown_test_environment)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "cloudysky.settings")
+
+_old_config = None
+
+
+def setup():
+    global _old_config
+    django.setup()
+    setup_test_environment()
+    _old_config = setup_databases(verbosity=0, interactive=False)
+
+
+def teardown():
+    teardown_databases(_old_config, verbosity=0)
+    teardown_test_environment()
+
+
+class SampleDataTestCase(TestCase):
+    """
+    Three users (alice, bob and the admin root) and 23 posts, every fifth
+    one hidden, in runs of identical timestamps so pages must break ties
+    on id. self.post has 11 comments, every fourth one hidden, all with
+    the same timestamp.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth.models import User
+        from app.models import Comment, Post
+
+        cls.alice = User.objects.create_user("alice", "alice@test.org", "Password123")
+        cls.bob = User.objects.create_user("bob", "bob@test.org", "Password123")
+        cls.admin = User.objects.create_user("root", "root@test.org", "Password123",
+                                             is_staff=True)
+        posts = []
+        for i in range(23):
+            author = cls.alice if i % 2 else cls.bob
+            posts.append(Post.objects.create(
+                author=author, title=f"post {i}",
+                content=f"apple pie number {i}" if i % 3 else f"banana {i}",
+                is_hidden=(i % 5 == 0)))
+        base = posts[0].created_at
+        for i, post in enumerate(posts):
+            Post.objects.filter(id=post.id).update(created_at=base + timedelta(seconds=i // 4))
+        cls.post = posts[1]
+        for i in range(11):
+            Comment.objects.create(post=cls.post, author=cls.bob if i % 2 else cls.alice,
+                                   content=f"apple comment {i}", is_hidden=(i % 4 == 0))
+        Comment.objects.filter(post=cls.post).update(created_at=base)
+
+    def client_for(self, user):
+        if user is not None:
+            self.client.force_login(user)
+        return self.client
+
+    def visible_posts(self, user):
+        """Ids of the posts user may see, newest first, as the feed lists them."""
+        from django.db.models import Q
+        from app.models import Post
+
+        posts = Post.objects.order_by("-created_at", "-id")
+        if user is None:
+            posts = posts.filter(is_hidden=False)
+        elif not user.is_staff:
+            posts = posts.filter(Q(is_hidden=False) | Q(author=user))
+        return list(posts.values_list("id", flat=True))
@@ -0,0 +1,53 @@
+"""
+Throwaway PostgreSQL cluster for running this suite against Postgres
+without containers: initdb into a temp dir, start it with pg_ctl on a
+private unix socket (no TCP listener), and hand back the environment that
+points cloudysky/settings.py at it.
+"""
+
+import contextlib
+import importlib.util
+import os
+import shutil
+import subprocess
+import tempfile
+
+USER = "cloudysky"
+DATABASE = "cloudysky"
+PORT = "5432"   # only names the socket file; nothing listens on TCP
+
+
+def postgres_available():
+    """
+    True if the PostgreSQL server binaries, the psycopg driver and
+    psycopg_pool (used by the default CLOUDYSKY_DB_POOL=1) are installed.
+    """
+    return (all(shutil.which(tool) for tool in ("initdb", "pg_ctl", "createdb"))
+            and all(importlib.util.find_spec(module) is not None
+                    for module in ("psycopg", "psycopg_pool")))
+
+
+@contextlib.contextmanager
+def temporary_cluster():
+    """Run a fresh cluster for the duration of the block; yields the env vars to use it."""
+    tmp = tempfile.mkdtemp(prefix="cloudysky-pg-")
+    data = os.path.join(tmp, "data")
+    quiet = {"stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+    subprocess.run(["initdb", "-D", data, "-U", USER, "--auth=trust", "-E", "UTF8", "--no-sync"],
+                   check=True, **quiet)
+    # Durability is pointless for a scratch cluster, so skip the fsyncs
+    options = f"-k {tmp} -p {PORT} -c listen_addresses='' -c fsync=off -c synchronous_commit=off"
+    subprocess.run(["pg_ctl", "-D", data, "-l", os.path.join(tmp, "server.log"),
+                    "-o", options, "-w", "start"], check=True, **quiet)
+    try:
+        subprocess.run(["createdb", "-h", tmp, "-p", PORT, "-U", USER, DATABASE], check=True)
+        yield {
+            "CLOUDYSKY_DB": "postgres",
+            "PGHOST": tmp,
+            "PGPORT": PORT,
+            "PGUSER": USER,
+            "PGDATABASE": DATABASE,
+        }
+    finally:
+        subprocess.run(["pg_ctl", "-D", data, "-m", "fast", "-w", "stop"], **quiet)
+        shutil.rmtree(tmp, ignore_errors=True)
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Checks the statistics helpers of the load-testing benchmarks."""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.http_load import percentile, summarize
+
+
+class TestPercentile(unittest.TestCase):
+    def test_nearest_rank(self):
+        hundred = list(range(1, 101))
+        self.assertEqual(percentile(hundred, 50), 50)
+        self.assertEqual(percentile(hundred, 95), 95)
+        self.assertEqual(percentile(hundred, 99), 99)
+        self.assertEqual(percentile(hundred, 100), 100)
+        ten = list(range(1, 11))
+        self.assertEqual(percentile(ten, 50), 5)
+        self.assertEqual(percentile(ten, 95), 10)
+        self.assertEqual(percentile(ten, 1), 1)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_summarize(self):
+        samples = [("feed", i / 1000, 200) for i in range(1, 101)] + [("search", 0.5, 500)]
+        report = summarize(samples, duration=2.0)
+        self.assertEqual(report["feed"]["p95_ms"], 95.0)
+        self.assertEqual(report["feed"]["errors"], 0)
+        self.assertEqual(report["search"]["errors"], 1)
+        self.assertEqual(report["ALL"]["requests"], 101)
+        self.assertEqual(report["ALL"]["rps"], 50.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
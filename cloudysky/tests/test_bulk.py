@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+In-process tests for /app/createBulk/ (see djangotest.py):
+
+    python -m pytest cloudysky/tests/test_bulk.py
+"""
+
+import json
+import unittest
+from unittest import mock
+
+from .djangotest import SampleDataTestCase, setup, teardown
+
+
+def setUpModule():
+    global Comment, IntegrityError, Post
+    setup()
+    from django.db import IntegrityError
+    from app.models import Comment, Post
+
+
+def tearDownModule():
+    teardown()
+
+
+class TestCreateBulk(SampleDataTestCase):
+    def post_bulk(self, body):
+        self.client.force_login(self.alice)
+        return self.client.post("/app/createBulk/", json.dumps(body),
+                                content_type="application/json")
+
+    def test_ids_come_back_in_request_order(self):
+        response = self.post_bulk({
+            "posts": [{"title": f"bulk {i}", "content": "x"} for i in range(5)],
+            "comments": [{"post_id": self.post.id, "content": f"c{i}"} for i in range(3)]
+                        + [{"post_id": str(self.post.id), "content": "c3"}],
+        })
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        titles = [Post.objects.get(id=id_).title for id_ in data["posts"]]
+        self.assertEqual(titles, [f"bulk {i}" for i in range(5)])
+        contents = [Comment.objects.get(id=id_).content for id_ in data["comments"]]
+        self.assertEqual(contents, ["c0", "c1", "c2", "c3"])
+
+    def test_bad_item_creates_nothing(self):
+        posts, comments = Post.objects.count(), Comment.objects.count()
+        good = [{"title": "fine", "content": "fine"}]
+        for body, status in (
+                ({"posts": good + [{"title": "no content"}]}, 400),
+                ({"posts": good + [{"title": 5, "content": "x"}]}, 400),
+                ({"posts": good, "comments": [{"post_id": True, "content": "x"}]}, 400),
+                ({"posts": good, "comments": [{"post_id": "1.5", "content": "x"}]}, 400),
+                ({"posts": good, "comments": [{"post_id": 10 ** 9, "content": "x"}]}, 404)):
+            with self.subTest(body=body):
+                self.assertEqual(self.post_bulk(body).status_code, status)
+                self.assertEqual(Post.objects.count(), posts)
+                self.assertEqual(Comment.objects.count(), comments)
+
+    def test_database_error_rolls_back_whole_batch(self):
+        posts = Post.objects.count()
+        with mock.patch.object(Comment.objects, "bulk_create", side_effect=IntegrityError("boom")):
+            response = self.post_bulk({
+                "posts": [{"title": "kept?", "content": "x"}],
+                "comments": [{"post_id": self.post.id, "content": "y"}],
+            })
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(Post.objects.count(), posts)
+
+    def test_requires_login(self):
+        response = self.client.post("/app/createBulk/", json.dumps({"posts": []}),
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()
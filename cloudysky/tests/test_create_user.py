@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+In-process tests for /app/createUser/ (see djangotest.py):
+
+    python -m pytest cloudysky/tests/test_create_user.py
+"""
+
+import unittest
+from unittest import mock
+
+from django.test import TestCase
+
+from .djangotest import setup, teardown
+
+
+def setUpModule():
+    global User
+    setup()
+    from django.contrib.auth.models import User
+
+
+def tearDownModule():
+    teardown()
+
+
+class TestCreateUser(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user("alice", "alice@test.org", "Password123")
+
+    def create(self, user_name, email, **fields):
+        data = {"user_name": user_name, "email": email, "password": "Password123",
+                "is_admin": "0", **fields}
+        return self.client.post("/app/createUser/", data)
+
+    def test_creates_user(self):
+        response = self.create("bob", "bob@test.org", is_admin="1")
+        self.assertEqual(response.status_code, 200)
+        user = User.objects.get(username="bob")
+        self.assertTrue(user.is_staff)
+        self.assertTrue(user.check_password("Password123"))
+        self.assertEqual(self.client.session["_auth_user_id"], str(user.pk))
+
+    def test_duplicates_are_case_insensitive(self):
+        for user_name, email, message in (("ALICE", "other@test.org", "Username already exists"),
+                                          ("other", "Alice@Test.org", "Email already in use"),
+                                          ("Alice", "ALICE@test.org", "Email already in use")):
+            with self.subTest(user_name=user_name, email=email):
+                response = self.create(user_name, email)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.content.decode(), message)
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_stored_forms_are_normalized(self):
+        self.assertEqual(self.create("ｃａｒｏｌ", "Carol@EXAMPLE.Org").status_code, 200)
+        user = User.objects.get(username="carol")
+        self.assertEqual(user.email, "Carol@example.org")
+        # A full-width spelling of an existing name is the same name
+        response = self.create("ａｌｉｃｅ", "new@test.org")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.content.decode(), "Username already exists")
+
+    def test_concurrent_insert_is_reported_as_duplicate(self):
+        # Pretend the check ran before another request inserted alice
+        with mock.patch.object(User.objects, "filter", return_value=User.objects.none()):
+            response = self.create("Alice", "else@test.org")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.content.decode(), "Username or email already in use")
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_missing_fields(self):
+        response = self.client.post("/app/createUser/", {"user_name": "dave", "is_admin": "0"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("email", response.content.decode())
+        self.assertIn("password", response.content.decode())
+
+
+if __name__ == "__main__":
+    unittest.main()
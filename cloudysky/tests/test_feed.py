@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+In-process tests for /app/feed/ (see djangotest.py):
+
+    python -m pytest cloudysky/tests/test_feed.py
+"""
+
+import unittest
+
+from .djangotest import SampleDataTestCase, setup, teardown
+
+
+def setUpModule():
+    global CaptureQueriesContext, connection, encode_cursor
+    setup()
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from app.pagination import encode_cursor
+
+
+def tearDownModule():
+    teardown()
+
+
+class TestFeed(SampleDataTestCase):
+    def walk(self, user, limit):
+        client = self.client_for(user)
+        url, ids = f"/app/feed/?limit={limit}", []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            self.assertLessEqual(len(page), limit)
+            ids += [item["id"] for item in page]
+            link = response.get("Link")
+            url = link[1:link.index(">")] if link else None
+        return ids
+
+    def test_pages_cover_feed_once_in_order(self):
+        for user in (None, self.alice, self.bob, self.admin):
+            for limit in (1, 4, 7, 100):
+                with self.subTest(user=user and user.username, limit=limit):
+                    self.assertEqual(self.walk(user, limit), self.visible_posts(user))
+
+    def test_post_queries_walk_an_index(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("checks SQLite query plans")
+        for user in (None, self.alice, self.admin):
+            with self.subTest(user=user and user.username):
+                client = self.client_for(user)
+                first = client.get("/app/feed/?limit=2")
+                link = first["Link"]
+                with CaptureQueriesContext(connection) as queries:
+                    client.get(link[1:link.index(">")])
+                plans = []
+                with connection.cursor() as cursor:
+                    for query in queries.captured_queries:
+                        if "app_post" in query["sql"]:
+                            cursor.execute("EXPLAIN QUERY PLAN " + query["sql"])
+                            plans.append(" / ".join(row[3] for row in cursor.fetchall()))
+                self.assertTrue(plans)
+                for plan in plans:
+                    self.assertIn("INDEX", plan)
+                    self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_bad_cursor_or_limit(self):
+        for query in ("cursor=garbage", f"cursor={encode_cursor([1])}", "limit=abc",
+                      "limit=0", "limit=-3"):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f"/app/feed/?{query}").status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+In-process tests for the live feed events (see djangotest.py):
+
+    python -m pytest cloudysky/tests/test_live.py
+"""
+
+import asyncio
+import unittest
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+
+from .djangotest import SampleDataTestCase, setup, teardown
+
+
+def setUpModule():
+    global AnonymousUser, Comment, Post, broker
+    setup()
+    from django.contrib.auth.models import AnonymousUser
+    from app.live import broker
+    from app.models import Comment, Post
+
+
+def tearDownModule():
+    teardown()
+
+
+class TestPublish(SampleDataTestCase):
+    def setUp(self):
+        # Events are only built while someone is subscribed
+        patcher = mock.patch.dict(broker.loops, {object(): set()})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(broker, "publish")
+        self.publish = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def events(self, save):
+        """The (event, data, audience) calls published by save() once it commits."""
+        self.publish.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            save()
+        return [(call.args[0], call.args[1], call.args[2] if len(call.args) > 2 else None)
+                for call in self.publish.call_args_list]
+
+    def test_hide_is_published_once(self):
+        post = Post.objects.get(id=self.post.id)
+        post.is_hidden = True
+        self.assertEqual(self.events(post.save),
+                         [("hide", {"kind": "post", "id": post.id, "post_id": post.id}, None)])
+        self.assertEqual(self.events(post.save), [])
+        # Loaded already hidden
+        self.assertEqual(self.events(Post.objects.get(id=post.id).save), [])
+        post.is_hidden = False
+        self.assertEqual(self.events(post.save), [])
+        post.is_hidden = True
+        self.assertEqual(len(self.events(post.save)), 1)
+
+    def test_update_fields_without_is_hidden(self):
+        post = Post.objects.get(id=self.post.id)
+        post.is_hidden = True
+        post.title = "renamed"
+        self.assertEqual(self.events(lambda: post.save(update_fields=["title"])), [])
+        self.assertEqual(len(self.events(lambda: post.save(update_fields=["is_hidden"]))), 1)
+        self.assertEqual(self.events(lambda: post.save(update_fields=["is_hidden"])), [])
+
+    def test_comment_hide(self):
+        comment = Comment.objects.filter(post=self.post, is_hidden=False).first()
+        comment.is_hidden = True
+        self.assertEqual(self.events(comment.save), [
+            ("hide", {"kind": "comment", "id": comment.id, "post_id": self.post.id}, None)])
+        self.assertEqual(self.events(comment.save), [])
+
+    def test_new_hidden_post_only_reaches_author(self):
+        def create():
+            Post.objects.create(author=self.bob, title="t", content="c", is_hidden=True)
+        [(event, data, audience)] = self.events(create)
+        self.assertEqual((event, data["title"], audience), ("post", "t", {self.bob.id}))
+
+    def test_nothing_is_published_before_commit(self):
+        post = Post.objects.get(id=self.post.id)
+        post.is_hidden = True
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            post.save()
+        self.assertEqual(len(callbacks), 1)
+        self.publish.assert_not_called()
+
+
+class TestBroker(SampleDataTestCase):
+    def test_audience_and_visibility(self):
+        async def deliver():
+            viewers = {"anon": AnonymousUser(), "alice": self.alice, "bob": self.bob,
+                       "admin": self.admin}
+            subscriptions = {name: broker.subscribe(user) for name, user in viewers.items()}
+            try:
+                broker.publish("post", {"id": 1}, {self.alice.id})
+                broker.publish("hide", {"id": 1})
+                await asyncio.sleep(0)
+                return {name: [s.queue.get_nowait().split("\n")[1]
+                               for _ in range(s.queue.qsize())]
+                        for name, s in subscriptions.items()}
+            finally:
+                for subscription in subscriptions.values():
+                    broker.unsubscribe(subscription)
+
+        received = async_to_sync(deliver)()
+        self.assertEqual(received, {"anon": ["event: hide"], "bob": ["event: hide"],
+                                    "alice": ["event: post", "event: hide"],
+                                    "admin": ["event: post", "event: hide"]})
+        self.assertEqual(broker.loops, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
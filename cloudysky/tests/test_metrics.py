@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for cloudysky.metrics. The shards are process-wide, so each test
+records under its own metric names:
+
+    python -m pytest cloudysky/tests/test_metrics.py
+"""
+
+import gc
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from django.test import SimpleTestCase, override_settings
+
+from .djangotest import setup, teardown
+
+
+def setUpModule():
+    global metrics
+    setup()
+    from cloudysky import metrics
+
+
+def tearDownModule():
+    teardown()
+
+
+def totals(name):
+    """{labels: value} of one counter or histogram from collect()."""
+    counters, histograms = metrics.collect()
+    found = {labels: value for (n, labels), value in counters.items() if n == name}
+    found.update({labels: h for (n, labels), h in histograms.items() if n == name})
+    return found
+
+
+class TestAggregation(SimpleTestCase):
+    def record(self, threads, per_thread):
+        def work(i):
+            for _ in range(per_thread):
+                metrics.inc("test_threads_total", view=f"v{i % 2}")
+                metrics.observe("test_threads_seconds", 0.003, view="v")
+
+        workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    def test_threads_sum_across_live_and_retired_shards(self):
+        shards = len(metrics._shards)
+        self.record(threads=8, per_thread=500)
+        expected = {(("view", "v0"),): 2000.0, (("view", "v1"),): 2000.0}
+        self.assertEqual(totals("test_threads_total"), expected)
+        # Ended threads fold into _retired; the totals don't move
+        gc.collect()
+        self.assertEqual(len(metrics._shards), shards)
+        self.assertEqual(totals("test_threads_total"), expected)
+
+        self.record(threads=2, per_thread=10)
+        self.assertEqual(totals("test_threads_total")[(("view", "v0"),)], 2010.0)
+        [h] = totals("test_threads_seconds").values()
+        self.assertEqual(h[-1], 8 * 500 + 2 * 10)
+        self.assertEqual(h[1], h[-1])   # all in the 0.005 bucket
+
+    def test_running_thread_is_counted(self):
+        recorded, done = threading.Event(), threading.Event()
+
+        def work():
+            metrics.inc("test_running_total", 3)
+            recorded.set()
+            done.wait()
+
+        worker = threading.Thread(target=work)
+        worker.start()
+        self.addCleanup(worker.join)
+        self.addCleanup(done.set)
+        recorded.wait()
+        self.assertEqual(totals("test_running_total"), {(): 3.0})
+
+    def test_render(self):
+        metrics.inc("test_render_total", 2, view="a", method="GET")
+        for value in (0.0005, 0.02, 20.0):
+            metrics.observe("test_render_seconds", value, view="a")
+        lines = metrics.render().splitlines()
+        self.assertIn("# TYPE test_render_total untyped", lines)
+        self.assertIn('test_render_total{method="GET",view="a"} 2', lines)
+        buckets = [line for line in lines if line.startswith("test_render_seconds_bucket")]
+        self.assertEqual(len(buckets), len(metrics.BUCKETS) + 1)
+        self.assertEqual(buckets[0], 'test_render_seconds_bucket{view="a",le="0.001"} 1')
+        self.assertEqual(buckets[4], 'test_render_seconds_bucket{view="a",le="0.05"} 2')
+        self.assertEqual(buckets[-1], 'test_render_seconds_bucket{view="a",le="+Inf"} 3')
+        self.assertIn('test_render_seconds_sum{view="a"} 20.0205', lines)
+        self.assertIn('test_render_seconds_count{view="a"} 3', lines)
+
+
+class TestSnapshots(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="metrics-test-")
+        self.addCleanup(shutil.rmtree, self.dir)
+        override = override_settings(METRICS_DIR=self.dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_other_processes_are_added(self):
+        metrics.inc("test_snapshot_total", 1, view="a")
+        metrics.flush(force=True)
+        self.assertTrue(os.path.exists(os.path.join(self.dir, f"metrics-{os.getpid()}.json")))
+        # Our own snapshot isn't counted twice
+        self.assertEqual(totals("test_snapshot_total"), {(("view", "a"),): 1.0})
+
+        other = {"counters": [["test_snapshot_total", [["view", "a"]], 4.0]],
+                 "histograms": [["test_snapshot_seconds", [], [1] + [0] * 12 + [0.5, 1]]]}
+        with open(os.path.join(self.dir, "metrics-1.json"), "w") as f:
+            json.dump(other, f)
+        with open(os.path.join(self.dir, "metrics-2.json"), "w") as f:
+            f.write("{truncated")
+        self.assertEqual(totals("test_snapshot_total"), {(("view", "a"),): 5.0})
+        self.assertEqual(totals("test_snapshot_seconds")[()][-1], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+In-process tests for post_detail and its paginated comments (see
+djangotest.py):
+
+    python -m pytest cloudysky/tests/test_pagination.py
+"""
+
+import unittest
+
+from .djangotest import SampleDataTestCase, setup, teardown
+
+
+def setUpModule():
+    global Comment, Post, encode_cursor
+    setup()
+    from app.models import Comment, Post
+    from app.pagination import encode_cursor
+
+
+def tearDownModule():
+    teardown()
+
+
+class TestPostDetail(SampleDataTestCase):
+    def test_comment_pages_cover_thread_once_in_order(self):
+        expected = list(Comment.objects.filter(post=self.post)
+                        .order_by("created_at", "id").values_list("id", flat=True))
+        for limit in (1, 3, 11, 50):
+            with self.subTest(limit=limit):
+                url, ids = f"/app/post/{self.post.id}/?limit={limit}", []
+                while url:
+                    response = self.client.get(url)
+                    self.assertEqual(response.status_code, 200)
+                    data = response.json()
+                    self.assertLessEqual(len(data["comments"]), limit)
+                    ids += [comment["id"] for comment in data["comments"]]
+                    cursor = data["comments_next"]
+                    url = f"/app/post/{self.post.id}/?limit={limit}&cursor={cursor}" if cursor else None
+                self.assertEqual(ids, expected)
+
+    def test_hidden_comments_are_placeholders_for_others(self):
+        data = self.client.get(f"/app/post/{self.post.id}/?limit=50").json()
+        hidden = [comment for comment in data["comments"] if comment["is_hidden"]]
+        self.assertTrue(hidden)
+        self.assertTrue(all(comment["author"] == "[removed]" for comment in hidden))
+
+    def test_bad_cursor_or_limit(self):
+        for query in ("cursor=garbage", f"cursor={encode_cursor(['x', 'y'])}", "limit=abc",
+                      "limit=0"):
+            with self.subTest(query=query):
+                response = self.client.get(f"/app/post/{self.post.id}/?{query}")
+                self.assertEqual(response.status_code, 400)
+
+    def test_missing_or_hidden_post(self):
+        missing = Post.objects.order_by("-id").first().id + 1
+        self.assertEqual(self.client.get(f"/app/post/{missing}/").status_code, 404)
+        hidden = Post.objects.filter(is_hidden=True, author=self.bob).first()
+        self.assertEqual(self.client.get(f"/app/post/{hidden.id}/").status_code, 404)
+        self.client.force_login(self.bob)
+        self.assertEqual(self.client.get(f"/app/post/{hidden.id}/").status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
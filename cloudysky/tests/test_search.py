@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+In-process tests for /app/search/ (see djangotest.py):
+
+    python -m pytest cloudysky/tests/test_search.py
+"""
+
+import unittest
+from unittest import mock
+
+from .djangotest import SampleDataTestCase, setup, teardown
+
+
+def setUpModule():
+    global Comment, Post, encode_cursor, fulltext
+    setup()
+    from app import search as fulltext
+    from app.models import Comment, Post
+    from app.pagination import encode_cursor
+
+
+def tearDownModule():
+    teardown()
+
+
+class TestSearch(SampleDataTestCase):
+    def walk(self, user, query, limit):
+        client = self.client_for(user)
+        url, results = f"/app/search/?q={query}&limit={limit}", []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertLessEqual(len(data["results"]), limit)
+            results += [(item["type"], item["id"]) for item in data["results"]]
+            url = f"/app/search/?q={query}&limit={limit}&cursor={data['next']}" if data["next"] else None
+        return results
+
+    def test_pages_cover_matches_once(self):
+        for user in (None, self.alice, self.admin):
+            visible = set(self.visible_posts(user))
+            is_staff = user is not None and user.is_staff
+            posts = [("post", post.id) for post in Post.objects.filter(content__contains="apple")
+                     if post.id in visible]
+            comments = [("comment", comment.id) for comment in Comment.objects.all()
+                        if not comment.is_hidden or is_staff or comment.author == user]
+            for limit in (1, 4, 100):
+                with self.subTest(user=user and user.username, limit=limit):
+                    results = self.walk(user, "apple", limit)
+                    self.assertEqual(len(results), len(set(results)))
+                    self.assertEqual(set(results), set(posts + comments))
+
+    def test_window_is_pinned_and_truncation_reported(self):
+        self.client.force_login(self.admin)
+        with mock.patch.object(fulltext, "MAX_CANDIDATES", 4):
+            first = self.client.get("/app/search/?q=apple&limit=3").json()
+            self.assertTrue(first["truncated"])
+            # Matches written after the first page stay out of its walk
+            Post.objects.create(author=self.alice, title="apple", content="apple apple")
+            results, cursor = first["results"], first["next"]
+            while cursor:
+                data = self.client.get(f"/app/search/?q=apple&limit=3&cursor={cursor}").json()
+                self.assertTrue(data["truncated"])
+                results += data["results"]
+                cursor = data["next"]
+        newest_posts = Post.objects.filter(content__contains="apple").exclude(title="apple") \
+            .order_by("-id").values_list("id", flat=True)[:4]
+        newest_comments = Comment.objects.order_by("-id").values_list("id", flat=True)[:4]
+        self.assertEqual(sorted((r["type"], r["id"]) for r in results),
+                         sorted([("comment", id_) for id_ in newest_comments]
+                                + [("post", id_) for id_ in newest_posts]))
+        self.assertFalse(self.client.get("/app/search/?q=apple").json()["truncated"])
+
+    def test_bad_cursor_or_limit(self):
+        stale = encode_cursor([-1.0, "post", 1])
+        for query in ("q=apple&cursor=garbage", f"q=apple&cursor={stale}", "q=apple&limit=abc",
+                      "q=apple&limit=0", ""):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f"/app/search/?{query}").status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
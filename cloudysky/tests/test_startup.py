@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for cloudysky.startup.ensure_schema, each run in fresh processes
+against a throwaway SQLite file as a multi-worker server would:
+
+    python -m pytest cloudysky/tests/test_startup.py
+"""
+
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+
+PROJECT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+import django
+django.setup()
+from cloudysky.startup import ensure_schema
+ensure_schema()
+"""
+
+
+class TestEnsureSchema(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.mkdtemp(prefix="cloudysky-startup-")
+        self.addCleanup(shutil.rmtree, tmp)
+        self.env = dict(os.environ, DJANGO_SETTINGS_MODULE="cloudysky.settings",
+                        CLOUDYSKY_DB="sqlite", CLOUDYSKY_AUTO_MIGRATE="1",
+                        CLOUDYSKY_SQLITE_PATH=os.path.join(tmp, "db.sqlite3"))
+
+    def start_workers(self, count):
+        workers = [subprocess.Popen([sys.executable, "-c", WORKER], cwd=PROJECT, env=self.env,
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                   for _ in range(count)]
+        errors = [worker.communicate(timeout=120)[1] for worker in workers]
+        return [(worker.returncode, stderr) for worker, stderr in zip(workers, errors)]
+
+    def test_concurrent_workers_migrate_once(self):
+        for status, stderr in self.start_workers(4):
+            self.assertEqual(status, 0, stderr[-2000:])
+        with sqlite3.connect(self.env["CLOUDYSKY_SQLITE_PATH"]) as db:
+            applied = db.execute("SELECT app, name, COUNT(*) FROM django_migrations "
+                                 "GROUP BY app, name HAVING COUNT(*) > 1").fetchall()
+            self.assertEqual(applied, [])
+            self.assertTrue(db.execute("SELECT COUNT(*) FROM django_migrations "
+                                       "WHERE app = 'app'").fetchone()[0])
+
+    def test_disabled(self):
+        self.env["CLOUDYSKY_AUTO_MIGRATE"] = "0"
+        [(status, stderr)] = self.start_workers(1)
+        self.assertEqual(status, 0, stderr[-2000:])
+        with sqlite3.connect(self.env["CLOUDYSKY_SQLITE_PATH"]) as db:
+            tables = db.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        self.assertEqual(tables, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
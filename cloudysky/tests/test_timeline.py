@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+In-process tests for the in-memory timeline (see djangotest.py). Each
+test builds its own Timeline, so the setting that enables the shared one
+doesn't matter:
+
+    python -m pytest cloudysky/tests/test_timeline.py
+"""
+
+import asyncio
+import time
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+
+from .djangotest import SampleDataTestCase, setup, teardown
+
+
+def setUpModule():
+    global AnonymousUser, Post, Timeline
+    setup()
+    from django.contrib.auth.models import AnonymousUser
+    from app.models import Post
+    from app.timeline import Timeline
+
+
+def tearDownModule():
+    teardown()
+
+
+class TestTimeline(SampleDataTestCase):
+    def loaded(self, size, max_age=60):
+        timeline = Timeline(size, max_age)
+        async_to_sync(timeline.aload)()
+        return timeline
+
+    def create_post(self, **fields):
+        """A post newer than every sample post, whose times run seconds ahead."""
+        newest = Post.objects.order_by("-created_at").first().created_at
+        with mock.patch("django.utils.timezone.now", return_value=newest + timedelta(seconds=1)):
+            return Post.objects.create(**fields)
+
+    def walk(self, timeline, user, limit):
+        """Ids of every page from the buffer, or None if it gave up."""
+        ids, position = [], None
+        while True:
+            page = async_to_sync(timeline.page)(user, position, limit)
+            if page is None:
+                return None
+            rows, position = page
+            self.assertLessEqual(len(rows), limit)
+            ids += [row["id"] for row in rows]
+            if position is None:
+                return ids
+
+    def test_pages_match_database_order_and_visibility(self):
+        timeline = self.loaded(50)
+        self.assertTrue(timeline.complete)
+        for user, viewer in ((AnonymousUser(), None), (self.alice, self.alice),
+                             (self.admin, self.admin)):
+            for limit in (1, 4, 23):
+                with self.subTest(user=str(user), limit=limit):
+                    self.assertEqual(self.walk(timeline, user, limit), self.visible_posts(viewer))
+
+    def test_pages_past_a_partial_buffer_fall_back(self):
+        timeline = self.loaded(10)
+        self.assertFalse(timeline.complete)
+        rows, position = async_to_sync(timeline.page)(self.admin, None, 4)
+        self.assertEqual([row["id"] for row in rows], self.visible_posts(self.admin)[:4])
+        self.assertIsNone(self.walk(timeline, self.admin, 4))
+        oldest = Post.objects.order_by("created_at", "id").first()
+        self.assertIsNone(async_to_sync(timeline.page)(
+            self.admin, (oldest.created_at, oldest.id), 4))
+
+    def test_saved_and_deleted_update_in_place(self):
+        timeline = self.loaded(50)
+        post = self.create_post(author=self.alice, title="new", content="x" * 300)
+        timeline.saved(post, True)
+        rows, _ = async_to_sync(timeline.page)(AnonymousUser(), None, 1)
+        self.assertEqual(rows[0]["id"], post.id)
+        self.assertEqual(rows[0]["content"], "x" * 200 + "...")
+        timeline.saved(post, True)
+        self.assertEqual(len(timeline.entries), 24)
+
+        post.is_hidden = True
+        post.title = "renamed"
+        timeline.saved(post, False)
+        rows, _ = async_to_sync(timeline.page)(AnonymousUser(), None, 1)
+        self.assertNotEqual(rows[0]["id"], post.id)
+        rows, _ = async_to_sync(timeline.page)(self.alice, None, 1)
+        self.assertEqual((rows[0]["id"], rows[0]["title"]), (post.id, "renamed"))
+
+        timeline.deleted(post.id)
+        self.assertNotIn(post.id, timeline.by_id)
+        self.assertEqual(len(timeline.entries), 23)
+        self.assertFalse(timeline.complete)
+
+    def test_full_buffer_evicts_oldest(self):
+        timeline = self.loaded(5)
+        oldest = timeline.entries[-1]["id"]
+        post = self.create_post(author=self.bob, title="new", content="new")
+        timeline.saved(post, True)
+        self.assertEqual(len(timeline.entries), 5)
+        self.assertEqual(timeline.entries[0]["id"], post.id)
+        self.assertNotIn(oldest, timeline.by_id)
+
+    def test_commits_reach_the_shared_timeline(self):
+        timeline = self.loaded(50)
+        with mock.patch("app.timeline.timeline", timeline):
+            with self.captureOnCommitCallbacks(execute=True):
+                post = self.create_post(author=self.bob, title="signal", content="x")
+            self.assertEqual(timeline.entries[0]["id"], post.id)
+            with self.captureOnCommitCallbacks(execute=True):
+                post.delete()
+            self.assertNotIn(post.id, timeline.by_id)
+
+    def test_stale_buffer_reloads_once(self):
+        timeline = self.loaded(50)
+        timeline.loaded_at = time.monotonic() - 120
+        real_load, loads = timeline.aload, []
+
+        async def slow_load():
+            loads.append(None)
+            await asyncio.sleep(0.05)
+            await real_load()
+
+        async def concurrent_pages():
+            return await asyncio.gather(*(timeline.page(self.admin, None, 3) for _ in range(4)))
+
+        with mock.patch.object(timeline, "aload", slow_load):
+            pages = async_to_sync(concurrent_pages)()
+        self.assertEqual(len(loads), 1)
+        # The others were served the old buffer instead of waiting
+        expected = self.visible_posts(self.admin)[:3]
+        self.assertEqual([[row["id"] for row in rows] for rows, _ in pages], [expected] * 4)
+        self.assertFalse(timeline.stale())
+
+    def test_first_load_in_progress_falls_back(self):
+        timeline = Timeline(50, 60)
+        self.assertTrue(timeline._reload_lock.acquire(blocking=False))
+        self.addCleanup(timeline._reload_lock.release)
+        self.assertIsNone(async_to_sync(timeline.page)(self.admin, None, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import itertools
+import string
+
+# --- CONFIGURATION ---
+ALPHABET = string.ascii_letters
+# ---------------------
+
+
+def osa_distance(a, b, alphabet=None):
+    """
+    Optimal string alignment distance (Levenshtein plus adjacent
+    transpositions) from b to a. With an alphabet, characters of a outside
+    it can only be matched, never inserted or substituted in.
+    """
+    inf = len(a) + len(b) + 1
+    prev, row = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cost = 1 if alphabet is None or a[i - 1] in alphabet else inf
+        new = [row[0] + cost]
+        for j in range(1, len(b) + 1):
+            match = row[j - 1] if a[i - 1] == b[j - 1] else row[j - 1] + cost
+            v = min(new[j - 1] + 1, row[j] + cost, match)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                v = min(v, prev[j - 2] + 1)
+            new.append(v)
+        prev, row = row, new
+    return row[-1]
+
+
+def stream_edits(word, distance=2, alphabet=ALPHABET, first=None):
+    """
+    Yields every non-empty string reachable from word by up to `distance`
+    (1 or 2) delete/transpose/replace/insert edits, each exactly once and
+    never word itself: the same strings as applying a 1-edit expansion
+    `distance` times, without building any sets.
+
+    The strings are enumerated as a depth-first walk over a trie of
+    candidates, carrying one edit-distance DP row per level and pruning
+    branches that already exceed the budget. Every string has exactly one
+    path in the trie, so nothing is produced twice and memory is bounded
+    by the word length. Once a branch has spent its whole budget, the only
+    completions left are verbatim suffixes of word, which are emitted
+    directly instead of walked.
+
+    first restricts the output to strings starting with one of those
+    characters, which splits the candidates into disjoint shards.
+    """
+    if distance not in (1, 2):
+        raise ValueError("distance must be 1 or 2")
+    n = len(word)
+    k = distance
+    # Original characters outside the alphabet can still be kept verbatim,
+    # but never inserted or substituted in
+    verbatim = "".join(c for c in dict.fromkeys(word) if c not in alphabet)
+    chars = alphabet + verbatim
+    top = chars if first is None else [c for c in chars if c in first]
+
+    # Stack entries: (prefix, DP row for prefix[:-1], DP row for prefix)
+    stack = [("", None, list(range(n + 1)))]
+    while stack:
+        prefix, prev, row = stack.pop()
+        last = prefix[-1:]
+        for c in (top if not prefix else chars):
+            edit_cost = k + 1 if c in verbatim else 1
+            new = [row[0] + edit_cost]
+            for j in range(1, n + 1):
+                v = row[j - 1] if word[j - 1] == c else row[j - 1] + edit_cost
+                if new[j - 1] + 1 < v:
+                    v = new[j - 1] + 1
+                if row[j] + edit_cost < v:
+                    v = row[j] + edit_cost
+                if (j > 1 and prev is not None and c == word[j - 2]
+                        and last == word[j - 1] and prev[j - 2] + 1 < v):
+                    v = prev[j - 2] + 1
+                new.append(v)
+            lowest = min(new)
+            if lowest > k:
+                continue
+            s = prefix + c
+            if lowest < k:
+                if new[n] <= k and s != word:
+                    yield s
+                stack.append((s, row, new))
+                continue
+            # Budget spent: the rest must copy a suffix of word verbatim, or
+            # finish a transposition that straddles this character
+            tails = [word[j:] for j in range(n + 1) if new[j] == k]
+            tails += [word[j - 2] + word[j:] for j in range(2, n + 1)
+                      if row[j - 2] == k - 1 and c == word[j - 1]]
+            for tail in dict.fromkeys(tails):
+                if s + tail != word:
+                    yield s + tail
+
+    if k == 2:
+        # Two sequential edits can also transpose a pair and then insert
+        # between, delete around or transpose again across it, which
+        # alignment distance counts as 3. There are only O(n * alphabet) of
+        # these, so a local set is fine.
+        extra = set()
+        for i in range(n - 1):
+            for c in alphabet:
+                extra.add(word[:i] + word[i + 1] + c + word[i] + word[i + 2:])
+            if i < n - 2:
+                extra.add(word[:i] + word[i + 2] + word[i] + word[i + 3:])
+                extra.add(word[:i] + word[i + 1] + word[i + 2] + word[i] + word[i + 3:])
+                extra.add(word[:i] + word[i + 2] + word[i] + word[i + 1] + word[i + 3:])
+        for s in extra:
+            if (first is None or s[:1] in first) and osa_distance(s, word, alphabet) > k:
+                yield s
+
+
+def shard_keys(word, alphabet=ALPHABET, shards=8):
+    """Splits the possible first characters of word's edits into `shards` groups for stream_edits(first=...)."""
+    chars = alphabet + "".join(c for c in dict.fromkeys(word) if c not in alphabet)
+    # The word's own first two letters head far more candidates than the
+    # rest, so each gets a shard of its own
+    heavy = list(dict.fromkeys(word[:2]))
+    light = [c for c in chars if c not in heavy]
+    groups = [c for c in heavy]
+    rest = max(1, shards - len(groups))
+    groups += ["".join(light[i::rest]) for i in range(rest) if light[i::rest]]
+    return groups
+
+
+def batched(iterable, size):
+    """Yields lists of up to size items from iterable without materializing it."""
+    it = iter(iterable)
+    while True:
+        batch = list(itertools.islice(it, size))
+        if not batch:
+            return
+        yield batch
@@ -1,41 +1,11 @@
-import hashlib
-import sys
+from hash_index import hash_positions, keyed_hasher
+from ranking import ranked_edits
 
 # --- CONFIGURATION ---
 KEY = "049677629"
 PUZZLE_FILE = "PUZZLE.txt"
 # ---------------------
 
-def edits2(word, alphabet):
-    """Generates all strings that are 2 edits away from the word."""
-    # 1. Generate all 1-edit strings
-    edits1 = set()
-    for k in range(len(word)):
-        edits1.add(word[:k] + word[k+1:])  # Delete
-        if k < len(word) - 1:
-            edits1.add(word[:k] + word[k+1] + word[k] + word[k+2:]) # Transpose
-        for c in alphabet:
-            edits1.add(word[:k] + c + word[k+1:]) # Replace
-    for k in range(len(word)+1):
-        for c in alphabet:
-            edits1.add(word[:k] + c + word[k:]) # Insert
-    
-    # 2. Generate all 2-edit strings (1-edit of a 1-edit string)
-    edits2 = set()
-    for e1 in edits1:
-        # Re-run all 1-edit operations on the 1-edit result (e1)
-        for k in range(len(e1)):
-            edits2.add(e1[:k] + e1[k+1:])
-            if k < len(e1) - 1:
-                edits2.add(e1[:k] + e1[k+1] + e1[k] + e1[k+2:])
-            for c in alphabet:
-                edits2.add(e1[:k] + c + e1[k+1:])
-        for k in range(len(e1)+1):
-            for c in alphabet:
-                edits2.add(e1[:k] + c + e1[k:])
-                
-    return edits2
-
 def solve():
     print("[*] Starting 2-Edit Deep Solver for 'tyrant'...")
     
@@ -52,49 +22,49 @@ def solve():
         print(f"[-] {PUZZLE_FILE} not found.")
         return
 
-    key_bytes = KEY.encode('utf-8')
     alphabet = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
     
     # 1. Generate 2-edit typos for "tyrant"
     target = "tyrant"
     print(f"[*] Generating all 1-edit and 2-edit typos for '{target}'...")
-    typo_candidates = edits2(target, alphabet)
     
-    # Add 1-edit typos (just in case the hash corresponds to a clean 1-edit base word)
-    # The edits1 generation is included within the edits2 function
+    # ranked_edits yields 1-edit typos too (just in case the hash corresponds to
+    # a clean 1-edit base word), each exactly once, most likely typo first,
+    # and holds only the 1-edit list in memory
     
-    # 2. Check the hashes
-    punctuation = [".", ",", "?", "!", ";", ":", '"', "'", "’", "“", "”", "-", ")", "]", "}"]
+    # 2. Check the hashes: every candidate is hashed once (the key prefix
+    # only once overall) and probed against all puzzle hashes at the same
+    # time, instead of once per target hash
+    punctuation = ["", ".", ",", "?", "!", ";", ":", '"', "'", "’", "“", "”", "-", ")", "]", "}"]
+    suffixes = [p.encode('utf-8') for p in punctuation]
+    positions = hash_positions(hashes)
+    targets = {bytes.fromhex(h): h for h in positions}
+    base = keyed_hasher(KEY)
     
-    found_typo = None
+    found_typos = {}
     
-    for target_hash in hashes:
-        if found_typo: break
-        
-        # Check against all typo candidates
-        for cand in typo_candidates:
-            # Check 1: Raw typo
-            if hashlib.sha256(key_bytes + cand.encode('utf-8')).hexdigest() == target_hash:
-                found_typo = f"[[TYPO: {cand} (2 edits from {target})]]"
-                break
-            
-            # Check 2: Typo + Suffix Punctuation (e.g. tirantt.)
-            for p in punctuation:
-                cand_p = cand + p
-                if hashlib.sha256(key_bytes + cand_p.encode('utf-8')).hexdigest() == target_hash:
-                    found_typo = f"[[TYPO: {cand_p} (2 edits from {target}{p})]]"
-                    break
-            
-            if found_typo: break
+    for cand in ranked_edits(target, 2, alphabet):
+        h = base.copy()
+        h.update(cand.encode('utf-8'))
+        # Raw typo ("" suffix) and typo + suffix punctuation (e.g. tirantt.)
+        for p, p_bytes in zip(punctuation, suffixes):
+            h_p = h.copy()
+            h_p.update(p_bytes)
+            digest = h_p.digest()
+            if digest in targets:
+                found_typos[targets[digest]] = f"[[TYPO: {cand}{p} (2 edits from {target}{p})]]"
         
         # We assume the last remaining blank is the misspelled word
         # The tyrant hash is located near the end of the text.
-        
-        # This is very aggressive. We assume the problem is a deep typo.
+        if found_typos:
+            break
     
     print("\n" + "="*60)
-    if found_typo:
-        print(f"[!!!] THE MISSPELLED WORD IS LIKELY: {found_typo}")
+    if found_typos:
+        for target_hash, found_typo in found_typos.items():
+            where = ", ".join(str(i + 1) for i in positions[target_hash])
+            print(f"[!!!] THE MISSPELLED WORD IS LIKELY: {found_typo}")
+            print(f"      It fills word position(s) {where} of {PUZZLE_FILE}.")
         print("Once you run the full decode, this string should appear in place of '___'.")
     else:
         print("[*] Failed to find a 2-edit typo for 'tyrant'.")
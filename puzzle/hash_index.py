@@ -0,0 +1,227 @@
+import array
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+# --- CONFIGURATION ---
+# Standard dictionary path on Linux/Unix systems (including Midway)
+DICT_PATH = "/usr/share/dict/words"
+# Built indexes are cached here, one file per (dictionary, extra words, key)
+INDEX_DIR = ".hashindex"
+# ---------------------
+
+# On-disk layout (all integers little-endian):
+#   header   MAGIC, word count N, blob length, dictionary size and mtime (ns)
+#   digests  N * 32 bytes, sha256(key + word), sorted ascending
+#   offsets  (N + 1) * uint64, word i is blob[offsets[i]:offsets[i + 1]]
+#   blob     utf-8 words concatenated in digest order
+MAGIC = b"PZHIDX02"
+HEADER = struct.Struct("<8sQQQq")
+DIGEST_SIZE = 32
+
+
+def load_words(dict_path=DICT_PATH, extra_words=()):
+    """Reads the dictionary (one word per line) and adds extra_words, deduplicated."""
+    try:
+        with open(dict_path, 'r', errors='ignore') as f:
+            words = [line.strip() for line in f]
+    except OSError:
+        # Fallback if system dict is missing (unlikely on Midway)
+        print("[-] System dictionary not found. Using small fallback.")
+        words = ["example", "test", "words"]
+    words.extend(extra_words)
+    return list(dict.fromkeys(w for w in words if w))
+
+
+def keyed_hasher(key):
+    """Returns a sha256 object already fed with the key; .copy() it per word."""
+    return hashlib.sha256(key.encode('utf-8'))
+
+
+def hash_positions(hashes):
+    """Maps each distinct (lowercase hex) hash to every position it occupies in hashes."""
+    positions = {}
+    for i, h in enumerate(hashes):
+        positions.setdefault(h.lower(), []).append(i)
+    return positions
+
+
+def index_path(key, dict_path=DICT_PATH, extra_words=(), index_dir=INDEX_DIR):
+    """
+    Location of the cached index for this dictionary, extra words and key.
+    The name carries a digest of the dictionary's real path and the extra
+    words, so two dictionaries sharing a basename, or different extras,
+    never reuse each other's index.
+    """
+    source = hashlib.sha256(os.path.realpath(dict_path).encode('utf-8'))
+    for w in sorted(set(extra_words)):
+        source.update(b"\0" + w.encode('utf-8'))
+    name = f"{os.path.basename(dict_path)}-{source.hexdigest()[:16]}-{key}.idx"
+    return os.path.join(index_dir, name)
+
+
+def build_index(key, words, path, source=(0, 0)):
+    """
+    Hashes every word with the key once and writes the sorted index to
+    path. source is the (size, mtime_ns) of the dictionary the words came
+    from, checked by open_index to tell when the index is out of date.
+    """
+    base = keyed_hasher(key)
+    entries = []
+    for w in words:
+        w_bytes = w.encode('utf-8')
+        h = base.copy()
+        h.update(w_bytes)
+        entries.append((h.digest(), w_bytes))
+    entries.sort()
+
+    # Drop words that collide on the same digest (identical after encoding)
+    digests = []
+    blobs = []
+    offsets = array.array('Q', [0])
+    for digest, w_bytes in entries:
+        if digests and digests[-1] == digest:
+            continue
+        digests.append(digest)
+        blobs.append(w_bytes)
+        offsets.append(offsets[-1] + len(w_bytes))
+    blob_len = offsets[-1]
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(digests), blob_len, *source))
+        f.write(b"".join(digests))
+        f.write(offsets.tobytes())
+        f.write(b"".join(blobs))
+    # Atomic rename so a concurrent reader never sees a half-written index
+    os.replace(tmp_path, path)
+    return len(digests)
+
+
+class HashIndex:
+    """Read-only, memory-mapped view of an index written by build_index."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < HEADER.size:
+            self._mm.close()
+            raise ValueError(f"{path} is truncated")
+        magic, self._count, blob_len, *source = HEADER.unpack_from(self._mm, 0)
+        self.source = tuple(source)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not a hash index")
+        self._digests_at = HEADER.size
+        self._offsets_at = self._digests_at + self._count * DIGEST_SIZE
+        self._blob_at = self._offsets_at + (self._count + 1) * 8
+        if self._blob_at + blob_len != len(self._mm):
+            self._mm.close()
+            raise ValueError(f"{path} is truncated")
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._mm.close()
+
+    def _digest_at(self, i):
+        start = self._digests_at + i * DIGEST_SIZE
+        return self._mm[start:start + DIGEST_SIZE]
+
+    def _word_at(self, i):
+        start, end = struct.unpack_from("<QQ", self._mm, self._offsets_at + i * 8)
+        return self._mm[self._blob_at + start:self._blob_at + end].decode('utf-8')
+
+    def get(self, digest, default=None):
+        """Word whose keyed hash is digest (raw bytes or hex string), else default."""
+        if isinstance(digest, str):
+            digest = bytes.fromhex(digest)
+        # Binary search straight over the mmap; only the touched pages are read
+        i = bisect.bisect_left(_DigestView(self), digest)
+        if i < self._count and self._digest_at(i) == digest:
+            return self._word_at(i)
+        return default
+
+    def __contains__(self, digest):
+        return self.get(digest) is not None
+
+    def words(self, start=0, stop=None):
+        """Yields the indexed words at positions [start, stop) (in digest order)."""
+        for i in range(start, self._count if stop is None else min(stop, self._count)):
+            yield self._word_at(i)
+
+
+class _DigestView:
+    """Sequence adapter so bisect can search the digest array in place."""
+
+    def __init__(self, index):
+        self._index = index
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getitem__(self, i):
+        return self._index._digest_at(i)
+
+
+def open_index(key, dict_path=DICT_PATH, extra_words=(), index_dir=INDEX_DIR):
+    """
+    Opens the index for key, building it first if missing or if the
+    dictionary's size or mtime changed since it was built. Without a
+    dictionary, the fallback word list is indexed in a temporary file
+    that is never reused.
+    """
+    path = index_path(key, dict_path, extra_words, index_dir)
+    try:
+        st = os.stat(dict_path)
+        source = (st.st_size, st.st_mtime_ns)
+    except OSError:
+        source = None
+    if source is not None:
+        try:
+            index = HashIndex(path)
+        except (OSError, ValueError):
+            index = None
+        if index is not None:
+            if index.source == source:
+                return index
+            index.close()
+
+    words = load_words(dict_path, extra_words)
+    if source is None:
+        fd, tmp_path = tempfile.mkstemp(suffix=".idx")
+        os.close(fd)
+        try:
+            build_index(key, words, tmp_path)
+            return HashIndex(tmp_path)
+        finally:
+            # The mmap stays valid after the name is gone
+            os.remove(tmp_path)
+
+    print(f"[*] Building hash index for key {key} at {path}...")
+    count = build_index(key, words, path, source)
+    print(f"[*] Indexed {count} words.")
+    return HashIndex(path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python hash_index.py <key>")
+        sys.exit(1)
+    with open_index(sys.argv[1]) as index:
+        print(f"[+] {index.path}: {len(index)} words")
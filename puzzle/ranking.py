@@ -0,0 +1,154 @@
+import math
+import string
+
+from edit_stream import stream_edits
+
+# --- CONFIGURATION ---
+# Optional corpus frequency list: "word count" per line, or one word per line
+# ordered most-frequent first. Falls back to COMMON_WORDS when missing.
+FREQ_PATH = "word_freq.txt"
+# ---------------------
+
+# Most frequent English words, most frequent first (used as a Zipf fallback)
+COMMON_WORDS = [
+    "the", "of", "and", "to", "a", "in", "is", "that", "for", "it",
+    "as", "was", "with", "be", "by", "on", "not", "he", "i", "this",
+    "are", "or", "his", "from", "at", "which", "but", "have", "an", "had",
+    "they", "you", "were", "their", "one", "all", "we", "can", "her", "has",
+    "there", "been", "if", "more", "when", "will", "would", "who", "so", "no",
+    "she", "other", "its", "may", "these", "what", "them", "than", "some", "him",
+    "time", "into", "only", "do", "out", "my", "up", "me", "could", "any",
+    "then", "about", "man", "like", "way", "our", "made", "over", "also", "did",
+    "new", "after", "such", "first", "should", "your", "those", "make", "most", "must",
+    "now", "very", "even", "people", "how", "just", "does", "life", "own", "end",
+]
+
+# QWERTY key centres (row, column) with the usual row stagger
+_KEY_POS = {}
+for _row, (_keys, _shift) in enumerate([("qwertyuiop", 0.0), ("asdfghjkl", 0.25), ("zxcvbnm", 0.75)]):
+    for _col, _k in enumerate(_keys):
+        _KEY_POS[_k] = (_row, _col + _shift)
+
+# Edit costs, roughly -log(likelihood) of each kind of slip
+COST_TRANSPOSE = 1.0
+COST_DOUBLE = 1.0        # deleting or inserting a repeated letter
+COST_NEAR_KEY = 1.5      # substitute/insert a neighbouring key, or a case slip
+COST_DELETE = 2.0
+COST_FAR_INSERT = 2.5
+COST_FAR_KEY = 3.0
+
+
+def load_frequencies(path=FREQ_PATH):
+    """Returns {lowercase word: count} from path, or a Zipf estimate over COMMON_WORDS."""
+    freqs = {}
+    try:
+        with open(path, 'r', errors='ignore') as f:
+            for rank, line in enumerate(f, 1):
+                parts = line.split()
+                if not parts:
+                    continue
+                count = float(parts[1]) if len(parts) > 1 else 1e9 / rank
+                word = parts[0].lower()
+                freqs[word] = freqs.get(word, 0) + count
+    except OSError:
+        for rank, word in enumerate(COMMON_WORDS, 1):
+            freqs.setdefault(word, 1e9 / rank)
+    return freqs
+
+
+def rank_words(words, freqs):
+    """Orders words most-frequent first; capitalised variants follow their lowercase form."""
+    return sorted(words, key=lambda w: (-freqs.get(w.lower(), 0), w != w.lower(), len(w), w))
+
+
+def key_distance(a, b):
+    """Distance between two keys on a QWERTY keyboard (case-insensitive)."""
+    pa = _KEY_POS.get(a.lower())
+    pb = _KEY_POS.get(b.lower())
+    if pa is None or pb is None:
+        return math.inf
+    return math.hypot(pa[0] - pb[0], pa[1] - pb[1])
+
+
+def _sub_cost(old, new):
+    if old.lower() == new.lower() or key_distance(old, new) <= 1.25:
+        return COST_NEAR_KEY
+    return COST_FAR_KEY
+
+
+def _insert_cost(left, c, right):
+    if c == left[-1:] or c == right[:1]:
+        return COST_DOUBLE
+    if any(key_distance(c, n) <= 1.25 for n in (left[-1:], right[:1]) if n):
+        return COST_NEAR_KEY
+    return COST_FAR_INSERT
+
+
+def scored_edits1(word, alphabet=string.ascii_letters):
+    """All 1-edit strings of word as (cost, string), cheapest (most likely typo) first."""
+    best = {}
+
+    def add(cand, cost):
+        if cost < best.get(cand, math.inf):
+            best[cand] = cost
+
+    for i in range(len(word) + 1):
+        left, right = word[:i], word[i:]
+        if right:
+            doubled = right[0] == left[-1:] or right[1:2] == right[0]
+            add(left + right[1:], COST_DOUBLE if doubled else COST_DELETE)
+            if len(right) > 1:
+                add(left + right[1] + right[0] + right[2:], COST_TRANSPOSE)
+            for c in alphabet:
+                if c != right[0]:
+                    add(left + c + right[1:], _sub_cost(right[0], c))
+        for c in alphabet:
+            add(left + c + right, _insert_cost(left, c, right))
+    best.pop(word, None)
+    return sorted((cost, cand) for cand, cost in best.items())
+
+
+def first_letter_groups(word, alphabet=string.ascii_letters):
+    """
+    The possible first characters of word's edits, grouped by the cost of
+    the slip that puts them there, cheapest group first: the word's own
+    first letter, then its second (first letter dropped or swapped), then
+    neighbouring keys and case slips, then everything else.
+    """
+    lead = word[:1]
+    groups = {}
+    for c in dict.fromkeys(alphabet + word):
+        if c == lead:
+            cost = 0.0
+        elif c == word[1:2]:
+            cost = COST_TRANSPOSE
+        elif lead and _sub_cost(lead, c) == COST_NEAR_KEY:
+            cost = COST_NEAR_KEY
+        else:
+            cost = COST_FAR_KEY
+        groups.setdefault(cost, []).append(c)
+    return ["".join(groups[cost]) for cost in sorted(groups)]
+
+
+def ranked_edits(word, distance=2, alphabet=string.ascii_letters):
+    """
+    Yields every string within `distance` (1 or 2) edits of word, each once.
+    The 1-edit strings come first, most likely typo first. The 2-edit
+    strings follow grouped by first_letter_groups, so candidates that keep
+    the first letter (a slip there is the least likely) come before those
+    starting with a neighbouring key, and those before the rest; within a
+    group they are in edit_stream.stream_edits order. Only the 1-edit list
+    is held in memory; the 2-edit layer, which is hundreds of times
+    larger, is never materialized or de-duplicated against a set.
+    """
+    if distance not in (1, 2):
+        raise ValueError("distance must be 1 or 2")
+    first = [cand for _, cand in scored_edits1(word, alphabet)]
+    yield from first
+    if distance == 1:
+        return
+    near = set(first)
+    for group in first_letter_groups(word, alphabet):
+        for cand in stream_edits(word, 2, alphabet, group):
+            if cand not in near:
+                yield cand
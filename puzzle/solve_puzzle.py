@@ -5,14 +5,16 @@ import sys
 import os
 import string
 
+from hash_index import DICT_PATH, hash_positions, open_index
+from ranking import load_frequencies, rank_words
+from typo_search import recover_typos
+
 # --- CONFIGURATION ---
 PUZZLE_FILE = "PUZZLE.txt"
 # PUZZLE_FILE = "PUZZLE-EASY.txt"
 
 # We assume one of these words appears in the text. "the" is statistically the safest bet.
 ANCHORS = ["the", "The", "and", "And", "a", "to", "of", "in", "is", "that"]
-# Standard dictionary path on Linux/Unix systems (including Midway)
-DICT_PATH = "/usr/share/dict/words"
 
 def load_hashes(filename):
     """Reads the puzzle file and extracts valid SHA256 hashes."""
@@ -39,10 +41,10 @@ def load_hashes(filename):
 
 def worker_search_key(args):
     """Worker process to search a specific range of numbers."""
-    start, end, target_hashes_set = args
+    start, end, target_hashes_set, anchors = args
     
     # Pre-encode anchors to save time in the tight loop
-    anchor_bytes = [w.encode('utf-8') for w in ANCHORS]
+    anchor_bytes = [w.encode('utf-8') for w in anchors]
     
     # Loop through the assigned range
     for i in range(start, end):
@@ -62,6 +64,8 @@ def worker_search_key(args):
 def find_key_parallel(target_hashes):
     """Splits the work across all available CPU cores."""
     target_set = set(target_hashes)
+    # Most frequent anchors first: on the right key they are the likeliest hit
+    anchors = rank_words(ANCHORS, load_frequencies())
     num_cores = multiprocessing.cpu_count()
     total_keys = 1_000_000_000 # 0 to 999,999,999
     # total_keys = 10000
@@ -76,7 +80,7 @@ def find_key_parallel(target_hashes):
     for i in range(num_cores):
         start = i * chunk_size
         end = (i + 1) * chunk_size if i < num_cores - 1 else total_keys
-        ranges.append((start, end, target_set))
+        ranges.append((start, end, target_set, anchors))
         
     start_time = time.time()
     
@@ -93,86 +97,52 @@ def find_key_parallel(target_hashes):
             
     return None
 
-def brute_force_typo(key, target_hash, dictionary_words):
-    """Finds the typo by trying 1-edit distance on dictionary words."""
-    print(f"[*] Attempting to break unknown hash: {target_hash[:10]}...")
-    key_bytes = key.encode('utf-8')
-    alphabet = string.ascii_letters
-    
-    # We try to 'break' every word in the dictionary to see if it matches the hash
-    # This assumes the typo is a 1-character error (substitution, deletion, insertion)
-    for word in dictionary_words:
-        if len(word) < 2: continue # Skip single chars usually
-        
-        edits = set()
-        # Deletions
-        for i in range(len(word)):
-            edits.add(word[:i] + word[i+1:])
-        # Transpositions
-        for i in range(len(word)-1):
-            edits.add(word[:i] + word[i+1] + word[i] + word[i+2:])
-        # Substitutions
-        for i in range(len(word)):
-            for c in alphabet:
-                edits.add(word[:i] + c + word[i+1:])
-        # Insertions
-        for i in range(len(word)+1):
-            for c in alphabet:
-                edits.add(word[:i] + c + word[i:])
-                
-        for candidate in edits:
-            h = hashlib.sha256(key_bytes + candidate.encode('utf-8')).hexdigest()
-            if h == target_hash:
-                return candidate, word # Found the typo, and the original word
-                
-    return None, None
-
 def decrypt_message(key, hashes_list):
     """Decrypts the full message."""
-    print("\n[*] Loading dictionary...")
-    try:
-        with open(DICT_PATH, 'r', errors='ignore') as f:
-            words = [line.strip() for line in f]
-    except:
-        # Fallback if system dict is missing (unlikely on Midway)
-        print("[-] System dictionary not found. Using small fallback.")
-        words = ANCHORS + ["example", "test", "words"]
+    # The keyed dictionary hashes live in an on-disk index built once per key
+    # (anchors added explicitly just in case); later runs only mmap it.
+    print("\n[*] Opening keyed dictionary index...")
+    index = open_index(key, DICT_PATH, ANCHORS)
 
-    # Add anchors explicitly just in case
-    words = list(set(words + ANCHORS))
-    
-    print("[*] Building Rainbow Table (hashing dictionary with key)...")
-    lookup = {}
-    key_bytes = key.encode('utf-8')
-    
-    for w in words:
-        h = hashlib.sha256(key_bytes + w.encode('utf-8')).hexdigest()
-        lookup[h] = w
-        
-    print("\n--- DECODED MESSAGE ---")
-    decoded_msg = []
+    # Each distinct hash is looked up once and written back to every
+    # position it occupies in the puzzle
+    positions = hash_positions(hashes_list)
+    decoded_msg = ["UNKNOWN"] * len(hashes_list)
     unknown_hashes = []
     
-    for h in hashes_list:
-        if h in lookup:
-            decoded_msg.append(lookup[h])
-        else:
-            decoded_msg.append("UNKNOWN")
+    for h, where in positions.items():
+        word = index.get(h)
+        if word is None:
             unknown_hashes.append(h)
+            continue
+        for i in where:
+            decoded_msg[i] = word
             
+    print("\n--- DECODED MESSAGE ---")
     print(" ".join(decoded_msg))
     print("-----------------------\n")
     
     if unknown_hashes:
         print(f"[*] Found {len(unknown_hashes)} unknown word(s). Analyzing...")
-        # Usually there's just one misspelled word
-        unique_unknowns = set(unknown_hashes)
-        for uh in unique_unknowns:
-            typo, original = brute_force_typo(key, uh, words)
-            if typo:
+        # Usually there's just one misspelled word; all of them are searched
+        # for in a single parallel pass over the dictionary's 1-edit typos,
+        # common words first, each candidate hashed once for every target;
+        # the workers read the dictionary straight from the mapped index
+        solved = recover_typos(key, unknown_hashes, index, distance=1,
+                               freqs=load_frequencies())
+        for uh in unknown_hashes:
+            if uh in solved:
+                typo, original = solved[uh]
+                for i in positions[uh]:
+                    decoded_msg[i] = typo
                 print(f"\n[!!!] SOLVED:")
                 print(f"      Misspelled Word: '{typo}'")
                 print(f"      Intended Word:   '{original}'")
+                print(f"      Word Position(s): {', '.join(str(i + 1) for i in positions[uh])}")
+        if solved:
+            print("\n--- DECODED MESSAGE (WITH TYPOS) ---")
+            print(" ".join(decoded_msg))
+            print("------------------------------------\n")
 
 if __name__ == "__main__":
     # 1. Load Hashes
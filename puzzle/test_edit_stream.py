@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Checks edit_stream against the brute-force set construction it replaces:
+
+    python -m pytest puzzle/test_edit_stream.py
+"""
+
+import string
+import unittest
+from collections import Counter
+
+from edit_stream import ALPHABET, osa_distance, shard_keys, stream_edits
+from ranking import first_letter_groups, ranked_edits
+
+WORDS = ["a", "ab", "aa", "abba", "tyrant", "letter", "can't", "x-ray", "mississippi"]
+SMALL = "abcdeilmnprsty"
+
+
+def edits1(word, alphabet=ALPHABET):
+    """All strings one delete/transpose/replace/insert away from word."""
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    edits = set()
+    for left, right in splits:
+        if right:
+            edits.add(left + right[1:])
+            if len(right) > 1:
+                edits.add(left + right[1] + right[0] + right[2:])
+            for c in alphabet:
+                edits.add(left + c + right[1:])
+        for c in alphabet:
+            edits.add(left + c + right)
+    return edits
+
+
+def edits2(word, alphabet=ALPHABET):
+    return {e2 for e1 in edits1(word, alphabet) for e2 in edits1(e1, alphabet)}
+
+
+def expected(word, distance, alphabet):
+    strings = edits1(word, alphabet)
+    if distance == 2:
+        strings |= edits2(word, alphabet)
+    return strings - {word, ""}
+
+
+class TestStreamEdits(unittest.TestCase):
+    def assertSameStrings(self, produced, reference):
+        counts = Counter(produced)
+        self.assertEqual([s for s, n in counts.items() if n > 1], [], "duplicates")
+        self.assertEqual(set(counts), reference)
+
+    def test_matches_brute_force(self):
+        for word in WORDS:
+            for distance in (1, 2):
+                alphabet = SMALL if distance == 2 else ALPHABET
+                with self.subTest(word=word, distance=distance):
+                    self.assertSameStrings(stream_edits(word, distance, alphabet),
+                                           expected(word, distance, alphabet))
+
+    def test_full_alphabet(self):
+        for word in ("ab", "tyrant"):
+            with self.subTest(word=word):
+                self.assertSameStrings(stream_edits(word, 2), expected(word, 2, ALPHABET))
+
+    def test_shards_partition_candidates(self):
+        for word in WORDS:
+            for shards in (1, 3, 8):
+                with self.subTest(word=word, shards=shards):
+                    keys = shard_keys(word, SMALL, shards)
+                    seen = Counter(c for key in keys for c in key)
+                    self.assertEqual([c for c, n in seen.items() if n > 1], [])
+                    parts = [set(stream_edits(word, 2, SMALL, key)) for key in keys]
+                    self.assertEqual(sum(map(len, parts)), len(set().union(*parts)))
+                    self.assertEqual(set().union(*parts), expected(word, 2, SMALL))
+
+    def test_ranked_edits_match_brute_force(self):
+        for word in ("abba", "tyrant", "can't"):
+            with self.subTest(word=word):
+                self.assertSameStrings(ranked_edits(word, 2, SMALL), expected(word, 2, SMALL))
+
+    def test_ranked_edits_order_by_likelihood(self):
+        ranked = list(ranked_edits("tyrant", 2, SMALL))
+        order = {cand: i for i, cand in enumerate(ranked)}
+        one = expected("tyrant", 1, SMALL)
+        # Every 1-edit string before any 2-edit one, keyboard slips first
+        self.assertEqual(set(ranked[:len(one)]), one)
+        self.assertLess(order["tryant"], order["tyrsnt"])
+        self.assertLess(order["tyrsnt"], order["tyrlnt"])
+        # 2-edit strings keeping the first letter, then the second, then near keys
+        group = {c: i for i, g in enumerate(first_letter_groups("tyrant", SMALL)) for c in g}
+        leads = [group[cand[0]] for cand in ranked[len(one):]]
+        self.assertEqual(leads, sorted(leads))
+
+    def test_first_letter_groups(self):
+        groups = first_letter_groups("tyrant", SMALL)
+        self.assertEqual(groups[:2], ["t", "y"])
+        self.assertIn("r", groups[2])
+        self.assertIn("a", groups[3])
+        self.assertEqual(sorted("".join(groups)), sorted(SMALL))
+
+    def test_rejects_other_distances(self):
+        for distance in (0, 3):
+            with self.assertRaises(ValueError):
+                list(stream_edits("word", distance))
+
+    def test_osa_distance(self):
+        self.assertEqual(osa_distance("abc", "abc"), 0)
+        self.assertEqual(osa_distance("acb", "abc"), 1)
+        self.assertEqual(osa_distance("", "abc"), 3)
+        self.assertEqual(osa_distance("ca", "abc"), 3)
+        self.assertGreater(osa_distance("a-c", "abc", string.ascii_letters), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Checks typo_search.recover_typos on a small keyed dictionary index:
+
+    python -m pytest puzzle/test_typo_search.py
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+
+from hash_index import open_index
+from typo_search import recover_typos
+
+KEY = "0042"
+WORDS = ["tyrant", "hello", "world", "the", "And", "x"]
+
+
+def digest(word):
+    return hashlib.sha256((KEY + word).encode('utf-8')).hexdigest()
+
+
+class TestRecoverTypos(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="typo-test-")
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.dict_path = os.path.join(self.tmpdir, "words")
+        with open(self.dict_path, "w") as f:
+            f.write("\n".join(WORDS) + "\n")
+        self.index = open_index(KEY, self.dict_path, ("anchor",), self.tmpdir)
+        self.addCleanup(self.index.close)
+
+    def test_index_and_word_list_agree(self):
+        typos = {digest(t): (t, w) for t, w in
+                 (("tyarnt", "tyrant"), ("helo", "hello"), ("anchro", "anchor"), ("teh", "the"))}
+        for source in (self.index, WORDS + ["anchor"]):
+            with self.subTest(source=type(source).__name__):
+                solved = recover_typos(KEY, list(typos) + [digest("zzzzzz")], source,
+                                       processes=2, freqs={"the": 100, "hello": 10})
+                self.assertEqual(solved, typos)
+
+    def test_two_edits_from_index(self):
+        typos = {digest("ohell"): ("ohell", "hello"), digest("Yhe"): ("Yhe", "the")}
+        solved = recover_typos(KEY, list(typos), self.index, distance=2, processes=2,
+                               freqs={"the": 100})
+        self.assertEqual(solved, typos)
+
+    def test_words_shorter_than_min_length_are_skipped(self):
+        solved = recover_typos(KEY, [digest("y")], self.index, processes=2)
+        self.assertEqual(solved, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,218 @@
+import argparse
+import itertools
+import multiprocessing
+import os
+import string
+import sys
+import time
+
+from edit_stream import batched, shard_keys, stream_edits
+from hash_index import DICT_PATH, HashIndex, keyed_hasher, open_index
+from ranking import load_frequencies, rank_words, ranked_edits
+
+# --- CONFIGURATION ---
+ALPHABET = string.ascii_letters
+# Trailing punctuation a hashed token may carry; pass ("",) + PUNCTUATION as
+# suffixes to also try "typo." etc. (16x the hashing work)
+PUNCTUATION = (".", ",", "?", "!", ";", ":", '"', "'", "’", "“", "”", "-", ")", "]", "}")
+# Dictionary words handed to a worker per task (1-edit search)
+CHUNK_WORDS = 500
+# Disjoint candidate shards per word (2-edit search), so even a single
+# word's neighborhood is spread over all cores
+SHARDS_PER_WORD = 16
+# Most frequent dictionary words searched ahead of the rest of an index
+PRIORITY_WORDS = 20000
+# ---------------------
+
+
+# Worker state, installed once per process by _init_worker
+_state = {}
+
+
+def _init_worker(key, targets, index_path, skip, min_length, distance, alphabet, suffixes):
+    _state["base"] = keyed_hasher(key)
+    _state["targets"] = targets
+    # Each worker maps the index itself; only the pages it reads are resident
+    _state["index"] = HashIndex(index_path) if index_path else None
+    _state["skip"] = skip
+    _state["min_length"] = min_length
+    _state["distance"] = distance
+    _state["alphabet"] = alphabet
+    _state["suffixes"] = [s.encode('utf-8') for s in suffixes]
+
+
+def _task_words(source):
+    """Base words of a task: a list of words, or a (start, stop) slice of the worker's index."""
+    if isinstance(source, list):
+        return source
+    skip = _state["skip"]
+    min_length = _state["min_length"]
+    return [w for w in _state["index"].words(*source)
+            if len(w) >= min_length and w not in skip]
+
+
+def _search_chunk(task):
+    """Streams the edit neighborhoods of a chunk of words and hashes each candidate against all targets."""
+    source, first = task
+    words = _task_words(source)
+    base = _state["base"]
+    targets = _state["targets"]
+    suffixes = _state["suffixes"]
+    distance = _state["distance"]
+    alphabet = _state["alphabet"]
+
+    # stream_edits never repeats a candidate for one word; candidates shared
+    # between the words of a 1-edit chunk are skipped with a per-chunk set.
+    # 2-edit tasks cover one word each, so they need no seen-set at all and
+    # memory stays flat. Dictionary words are never filtered out: their
+    # digests are all in the index, so none of them can be a target.
+    seen = set() if len(words) > 1 else None
+    found = []
+    for word in words:
+        # 1-edit typos are tried most likely first (keyboard slips before
+        # far substitutions); 2-edit tasks are already one shard of one word
+        if distance == 1:
+            candidates = ranked_edits(word, 1, alphabet)
+        elif isinstance(first, int):
+            keys = shard_keys(word, alphabet, SHARDS_PER_WORD)
+            if first >= len(keys):
+                continue
+            candidates = stream_edits(word, distance, alphabet, keys[first])
+        else:
+            candidates = stream_edits(word, distance, alphabet, first)
+        for cand in candidates:
+            if seen is not None:
+                if cand in seen:
+                    continue
+                seen.add(cand)
+            h = base.copy()
+            h.update(cand.encode('utf-8'))
+            for suffix in suffixes:
+                hs = h.copy()
+                hs.update(suffix)
+                digest = hs.digest()
+                if digest in targets:
+                    found.append((digest.hex(), cand + suffix.decode('utf-8'), word))
+    return found
+
+
+def _indexed_words(key, index, words):
+    """The words (and their capitalised forms) that are in index, in order."""
+    base = keyed_hasher(key)
+    present = []
+    for w in words:
+        for form in dict.fromkeys((w, w.capitalize())):
+            h = base.copy()
+            h.update(form.encode('utf-8'))
+            if index.get(h.digest()) == form:
+                present.append(form)
+    return present
+
+
+def _tasks(key, words, distance, alphabet, min_length, freqs):
+    """
+    (task iterator, words to skip in index slices, index path or None,
+    base word count) for recover_typos.
+    """
+    if isinstance(words, HashIndex) and os.path.exists(words.path):
+        # Only the most frequent words are listed up front; the rest of the
+        # dictionary is handed out as index slices the workers read directly
+        ranked = rank_words(freqs, freqs)[:PRIORITY_WORDS] if freqs else []
+        priority = [w for w in _indexed_words(key, words, ranked) if len(w) >= min_length]
+        spans = ((start, start + CHUNK_WORDS) for start in range(0, len(words), CHUNK_WORDS))
+        if distance == 1:
+            tasks = itertools.chain(
+                ((chunk, None) for chunk in batched(priority, CHUNK_WORDS)),
+                ((span, None) for span in spans))
+        else:
+            tasks = itertools.chain(
+                (([w], first) for w in priority
+                 for first in shard_keys(w, alphabet, SHARDS_PER_WORD)),
+                # The parent never reads these words, so each task names a
+                # shard by number and the worker resolves it with shard_keys
+                (((i, i + 1), shard) for i in range(len(words))
+                 for shard in range(SHARDS_PER_WORD)))
+        # Only the priority words (at most PRIORITY_WORDS and their
+        # capitalised forms) are sent to the workers, to be skipped in slices
+        return tasks, frozenset(priority), words.path, len(words)
+
+    if isinstance(words, HashIndex):
+        # A temporary index (no dictionary installed) is a handful of words
+        words = list(words.words())
+    bases = [w for w in dict.fromkeys(words) if len(w) >= min_length]
+    if freqs:
+        bases = rank_words(bases, freqs)
+    else:
+        # Sorted so each chunk holds neighbouring words with overlapping edits
+        bases.sort()
+    if distance == 1:
+        tasks = ((chunk, None) for chunk in batched(bases, CHUNK_WORDS))
+    else:
+        tasks = (([w], first) for w in bases
+                 for first in shard_keys(w, alphabet, SHARDS_PER_WORD))
+    return tasks, frozenset(), None, len(bases)
+
+
+def recover_typos(key, target_hashes, words, distance=1, processes=None,
+                  alphabet=ALPHABET, suffixes=("",), min_length=2, freqs=None):
+    """
+    Searches the edit neighborhoods of words for every target hash at once.
+    words is a list of base words or a HashIndex; an index is read by the
+    workers directly, so the dictionary is never loaded into memory. With
+    freqs ({word: count}), the most frequent words are searched first.
+
+    Returns {target_hash: (typo, original_word)} (lowercase hex keys) for each
+    target that was hit; stops as soon as all targets are found.
+    """
+    remaining = {bytes.fromhex(h) for h in target_hashes}
+    if not remaining:
+        return {}
+    tasks, skip, index_path, count = _tasks(key, words, distance, alphabet, min_length, freqs)
+    processes = processes or multiprocessing.cpu_count()
+
+    print(f"[*] Searching {distance}-edit typos of {count} words for "
+          f"{len(remaining)} hash(es) on {processes} cores...")
+    start_time = time.time()
+    results = {}
+    with multiprocessing.Pool(
+            processes=processes,
+            initializer=_init_worker,
+            initargs=(key, frozenset(remaining), index_path, skip, min_length,
+                      distance, alphabet, suffixes)) as pool:
+        for found in pool.imap_unordered(_search_chunk, tasks):
+            for digest_hex, typo, original in found:
+                if digest_hex not in results:
+                    results[digest_hex] = (typo, original)
+                    remaining.discard(bytes.fromhex(digest_hex))
+            if not remaining:
+                # Every target is solved; no need to finish the dictionary
+                pool.terminate()
+                break
+    print(f"[*] Typo search finished in {time.time() - start_time:.2f} seconds.")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recover misspelled words from keyed hashes.")
+    parser.add_argument("key", help="Puzzle key")
+    parser.add_argument("hashes", nargs="+", help="Unknown sha256(key + word) hex digests")
+    parser.add_argument("--distance", type=int, choices=(1, 2), default=1)
+    parser.add_argument("--words", nargs="+", help="Base words to search (default: dictionary)")
+    parser.add_argument("--dict", default=DICT_PATH, help="Dictionary path")
+    parser.add_argument("--punctuation", action="store_true",
+                        help="Also try candidates followed by trailing punctuation")
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    hashes = [h.lower() for h in args.hashes]
+    words = args.words or open_index(args.key, args.dict)
+    suffixes = ("",) + PUNCTUATION if args.punctuation else ("",)
+    solved = recover_typos(args.key, hashes, words, args.distance, args.processes,
+                           suffixes=suffixes, freqs=load_frequencies())
+    for h in hashes:
+        if h in solved:
+            typo, original = solved[h]
+            print(f"[!!!] {h[:10]}...: '{typo}' (from '{original}')")
+        else:
+            print(f"[-] {h[:10]}...: not found")
+    sys.exit(0 if len(solved) == len(set(hashes)) else 1)
@@ -1,13 +1,14 @@
-import random
 import sys
 
+from samplit import sample_file
+
 def samp_lines(filename, prob=0.01):
-    # Assume file exists and is readable
-    with open(filename, 'r') as file: 
-        for line in file:
-            if random.random() < prob: 
-                # 0 to 1, so 1% chance being retained
-                print(line, end='')
+    # Assume file exists and is readable.
+    # Bernoulli sample: each line has a prob (default 1%) chance of being
+    # retained; samplit draws the gaps between kept lines instead of calling
+    # random() per line, and writes through a buffered binary writer.
+    # .gz/.bz2/.xz/.zst files are decompressed on the fly.
+    sample_file(filename, mode="bernoulli", rate=prob)
 
 if __name__ == '__main__':
     if len(sys.argv) != 2:
@@ -1,16 +1,16 @@
 #!/usr/bin/env python3
 import sys
-import random
+
+from samplit import sample_file
 
 def main():
 
 	filename = sys.argv[1]
-	
-	with open(filename, 'r', encoding='utf-8') as f:
-		for line in f:
-			if random.random() < 0.01:
-				print(line, end='')
+
+	# Keep each line with probability 0.01. samplit skips ahead by
+	# geometric gaps instead of calling random() and print() per line,
+	# and reads .gz/.bz2/.xz/.zst input directly.
+	sample_file(filename, mode="bernoulli", rate=0.01)
 
 if __name__ == "__main__":
 	main()
-
@@ -0,0 +1,679 @@
+#!/usr/bin/env python3
+"""
+Samplit
+=======
+
+Streaming line sampler for arbitrarily large text files (supersedes the
+per-student samplit-<username>.py scripts).
+
+Modes:
+- bernoulli:  keep each line independently with probability --rate
+- reservoir:  keep exactly -k uniformly random lines (Algorithm L)
+- stratified: keep up to -k uniformly random lines per key (--key-field)
+
+Every mode runs in constant memory with respect to the input size. Lines
+are handled as raw bytes (never decoded) and written through a large
+buffered writer. Bernoulli and reservoir sampling draw the gap to the next
+kept line instead of calling random() per line, so skipped lines are
+consumed by C-level iteration without touching the interpreter loop.
+Bernoulli sampling of a regular file runs over a memory map of it, split
+into line-aligned windows, which also allows sampling any byte range.
+
+Gzip, bzip2 and xz inputs (and zstd, if the zstandard package is
+installed) are recognised by their magic bytes and decompressed on the
+fly by a background thread, so decompression overlaps with sampling.
+
+Usage:
+    python samplit.py FILE [--mode bernoulli] [--rate 0.01] [--seed N] [--workers N]
+    python samplit.py FILE --mode reservoir -k 1000
+    python samplit.py FILE --mode stratified -k 100 --key-field 3 --delimiter ,
+"""
+
+import argparse
+import bz2
+import gzip
+import io
+import lzma
+import math
+import mmap
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+from itertools import islice
+from queue import Queue
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# ============================================================================
+# CONFIGURATION SECTION
+# ============================================================================
+SETTINGS = {
+    "rate": 0.01,                   # default Bernoulli keep probability
+    "read_buffer": 1 << 22,         # bytes buffered per read / mmap window
+    "chunk_size": 1 << 26,          # bytes per parallel task (fixes the sample for a seed)
+    "prefetch": 4,                  # decompressed blocks buffered ahead of the sampler
+    "write_buffer": 1 << 22,        # bytes buffered before each output write
+}
+
+
+# ============================================================================
+# SAMPLING ALGORITHMS
+# ============================================================================
+
+def geometric_gap(rate: float, rng: random.Random) -> int:
+    """
+    Number of lines to skip before the next kept line under Bernoulli(rate).
+
+    Equivalent to counting failures of per-line random() < rate draws, with
+    a single draw per kept line.
+    """
+    if rate >= 1.0:
+        return 0
+    # 1 - random() lies in (0, 1], so the log is always defined
+    return int(math.log(1.0 - rng.random()) / math.log1p(-rate))
+
+
+def bernoulli(lines: Iterable[bytes], rate: float, rng: random.Random) -> Iterator[bytes]:
+    """
+    Yield each line independently with probability rate.
+
+    Args:
+        lines: Iterable of lines
+        rate: Keep probability in [0, 1]
+        rng: Random source
+
+    Yields:
+        The kept lines, in input order
+    """
+    if rate <= 0.0:
+        return
+    it = iter(lines)
+    while True:
+        # Skip the gap with a C-level islice rather than a Python loop
+        line = next(islice(it, geometric_gap(rate, rng), None), None)
+        if line is None:
+            return
+        yield line
+
+
+def reservoir(lines: Iterable[bytes], k: int, rng: random.Random) -> List[bytes]:
+    """
+    Uniform sample of k lines without replacement (Li's Algorithm L).
+
+    Args:
+        lines: Iterable of lines
+        k: Sample size
+        rng: Random source
+
+    Returns:
+        Up to k lines (fewer if the input is shorter), in input order
+    """
+    if k <= 0:
+        return []
+    it = iter(lines)
+    # Track input positions so the sample can be emitted in input order
+    sample = list(enumerate(islice(it, k)))
+    if len(sample) < k:
+        return [line for _, line in sample]
+
+    position = k - 1
+    w = math.exp(math.log(rng.random() or 1e-300) / k)
+    while True:
+        skip = int(math.log(rng.random() or 1e-300) / math.log1p(-w))
+        line = next(islice(it, skip, None), None)
+        if line is None:
+            break
+        position += skip + 1
+        sample[rng.randrange(k)] = (position, line)
+        w *= math.exp(math.log(rng.random() or 1e-300) / k)
+
+    sample.sort()
+    return [line for _, line in sample]
+
+
+def mmap_lines(buf, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Lazily split buf[start:end] (e.g. an mmap) into lines.
+
+    The range is cut into line-aligned windows of about read_buffer bytes
+    with memchr-backed find/rfind on the buffer itself; each window is then
+    split by BytesIO's C line iterator. Only one window is resident at a
+    time.
+
+    Args:
+        buf: Buffer supporting find(), rfind() and slicing, such as mmap.mmap
+        start: First byte offset (must be at a line start)
+        end: Stop offset (default len(buf); must be at a line start or the end)
+
+    Yields:
+        Lines as bytes, including their newline
+    """
+    end = len(buf) if end is None else end
+    size = SETTINGS["read_buffer"]
+    pos = start
+    while pos < end:
+        stop = min(pos + size, end)
+        if stop < end:
+            nl = buf.rfind(b"\n", pos, stop)
+            if nl < 0:
+                # A single line longer than the window
+                nl = buf.find(b"\n", stop, end)
+            stop = end if nl < 0 else nl + 1
+        yield from io.BytesIO(buf[pos:stop])
+        pos = stop
+
+
+def bernoulli_mmap(buf, rate: float, rng: random.Random, out: BinaryIO,
+                   start: int = 0, end: Optional[int] = None) -> int:
+    """
+    Bernoulli sample of the lines in buf[start:end] (e.g. an mmap), written to out.
+
+    Geometric gaps between kept lines are skipped with islice over
+    mmap_lines, so skipped lines never reach Python code or get decoded.
+
+    Args:
+        buf: Buffer supporting find(), rfind() and slicing, such as mmap.mmap
+        rate: Keep probability in [0, 1]
+        rng: Random source
+        out: Binary writer for the kept lines
+        start: First byte offset (must be at a line start)
+        end: Stop offset (default len(buf); must be at a line start or the end)
+
+    Returns:
+        Number of lines written
+    """
+    kept = 0
+    write = out.write
+    for line in bernoulli(mmap_lines(buf, start, end), rate, rng):
+        write(line if line.endswith(b"\n") else line + b"\n")
+        kept += 1
+    return kept
+
+
+class _Stratum:
+    """Algorithm L state for one stratum of a stratified sample."""
+
+    __slots__ = ("sample", "seen", "next_pick", "w")
+
+    def __init__(self) -> None:
+        self.sample: List = []
+        self.seen = 0
+        self.next_pick = 0
+        self.w = 1.0
+
+
+def stratified(lines: Iterable[bytes], k: int, rng: random.Random,
+               key_field: int = 1, delimiter: Optional[bytes] = None) -> Dict[bytes, List[bytes]]:
+    """
+    Uniform sample of up to k lines for every distinct key.
+
+    Args:
+        lines: Iterable of lines
+        k: Sample size per stratum
+        rng: Random source
+        key_field: 1-based field holding the stratum key (like cut -f)
+        delimiter: Field separator; None splits on runs of whitespace
+
+    Returns:
+        Dict mapping each key to its sampled lines, in input order
+    """
+    strata = _stratify(lines, k, rng, key_field, delimiter)
+    return {key: [line for _, line in sorted(s.sample)] for key, s in strata.items()}
+
+
+def _stratify(lines: Iterable[bytes], k: int, rng: random.Random,
+              key_field: int, delimiter: Optional[bytes]) -> Dict[bytes, _Stratum]:
+    """Per-key Algorithm L states (sample with input positions, lines seen) for stratified()."""
+    strata: Dict[bytes, _Stratum] = {}
+    if k <= 0:
+        return strata
+    index = key_field - 1
+    for position, line in enumerate(lines):
+        fields = line.split(delimiter, key_field) if delimiter is not None else line.split(None, key_field)
+        key = fields[index].rstrip(b"\r\n") if index < len(fields) else b""
+        stratum = strata.get(key)
+        if stratum is None:
+            stratum = strata[key] = _Stratum()
+
+        seen = stratum.seen
+        stratum.seen += 1
+        if seen < k:
+            stratum.sample.append((position, line))
+            if seen == k - 1:
+                stratum.w = math.exp(math.log(rng.random() or 1e-300) / k)
+                stratum.next_pick = stratum.seen + int(
+                    math.log(rng.random() or 1e-300) / math.log1p(-stratum.w))
+        elif seen == stratum.next_pick:
+            stratum.sample[rng.randrange(k)] = (position, line)
+            stratum.w *= math.exp(math.log(rng.random() or 1e-300) / k)
+            stratum.next_pick = stratum.seen + int(
+                math.log(rng.random() or 1e-300) / math.log1p(-stratum.w))
+
+    return strata
+
+
+# ============================================================================
+# I/O
+# ============================================================================
+
+# Leading magic bytes of each supported compressed format
+MAGIC = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bzip2",
+    b"\xfd7zXZ\x00": "xz",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+
+
+def compression_of(f: BinaryIO) -> Optional[str]:
+    """Name of the compression format f starts with, or None (f must support peek())."""
+    head = f.peek(6)[:6]
+    for magic, name in MAGIC.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def _decompressor(f: BinaryIO, fmt: str) -> BinaryIO:
+    """Wrap the compressed stream f in a streaming decompressor for fmt."""
+    if fmt == "gzip":
+        return gzip.GzipFile(fileobj=f, mode="rb")
+    if fmt == "bzip2":
+        return bz2.BZ2File(f, "rb")
+    if fmt == "xz":
+        return lzma.LZMAFile(f, "rb")
+    if zstandard is None:
+        raise RuntimeError("zstd input needs the zstandard package (pip install zstandard)")
+    # Like the other formats, read every concatenated frame (zstd -c a b,
+    # pzstd), not just the first
+    return zstandard.ZstdDecompressor().stream_reader(f, read_size=SETTINGS["read_buffer"],
+                                                      read_across_frames=True)
+
+
+class ThreadedReader(io.RawIOBase):
+    """
+    Raw reader that pulls blocks from a decompressing stream in a
+    background thread.
+
+    zlib, bz2, lzma and zstd release the GIL while they work, so the next
+    blocks are decompressed while the caller samples the current one. At
+    most SETTINGS['prefetch'] blocks are held in memory.
+    """
+
+    def __init__(self, stream: BinaryIO, block_size: int = SETTINGS["read_buffer"],
+                 source: Optional[BinaryIO] = None):
+        super().__init__()
+        self._stream = stream
+        self._source = source
+        self._queue: Queue = Queue(maxsize=SETTINGS["prefetch"])
+        self._block = memoryview(b"")
+        self._done = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._fill, args=(block_size,), daemon=True)
+        self._thread.start()
+
+    def _fill(self, block_size: int) -> None:
+        try:
+            while not self._stop.is_set():
+                block = self._stream.read(block_size)
+                self._queue.put(block)
+                if not block:
+                    return
+        except Exception as e:  # handed to the reading thread
+            self._queue.put(e)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if not self._block:
+            if self._done:
+                return 0
+            item = self._queue.get()
+            if isinstance(item, Exception):
+                self._done = True
+                raise item
+            if not item:
+                self._done = True
+                return 0
+            self._block = memoryview(item)
+        n = min(len(b), len(self._block))
+        b[:n] = self._block[:n]
+        self._block = self._block[n:]
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stop.set()
+            # Unblock the reader thread if it is waiting on a full queue
+            while self._thread.is_alive():
+                while not self._queue.empty():
+                    self._queue.get_nowait()
+                self._thread.join(0.05)
+            self._stream.close()
+            if self._source is not None:
+                self._source.close()
+        super().close()
+
+
+def open_input(path: str) -> BinaryIO:
+    """
+    Open path (or '-' for stdin) for buffered binary reading, transparently
+    decompressing gzip/bzip2/xz/zstd input in a background thread.
+    """
+    f = sys.stdin.buffer if path == "-" else open(path, "rb", buffering=SETTINGS["read_buffer"])
+    fmt = compression_of(f)
+    if fmt is None:
+        return f
+    source = None if f is sys.stdin.buffer else f
+    return io.BufferedReader(ThreadedReader(_decompressor(f, fmt), source=source),
+                             buffer_size=SETTINGS["read_buffer"])
+
+
+def is_compressed(path: str) -> bool:
+    """True if the file at path is in one of the compressed formats open_input reads."""
+    with open(path, "rb") as f:
+        return compression_of(f) is not None
+
+
+def open_output(path: Optional[str] = None) -> BinaryIO:
+    """Open path (default stdout) behind a large buffered binary writer."""
+    if path is None or path == "-":
+        return io.BufferedWriter(io.FileIO(sys.stdout.fileno(), "wb", closefd=False),
+                                 buffer_size=SETTINGS["write_buffer"])
+    return open(path, "wb", buffering=SETTINGS["write_buffer"])
+
+
+def _terminated(lines: Iterable[bytes]) -> Iterator[bytes]:
+    """Make sure every line ends in a newline (the input's last line may not)."""
+    for line in lines:
+        yield line if line.endswith(b"\n") else line + b"\n"
+
+
+def sample_file(path: str, mode: str = "bernoulli", rate: float = SETTINGS["rate"],
+                k: int = 1000, seed: Optional[int] = None, key_field: int = 1,
+                delimiter: Optional[bytes] = None, output: Optional[str] = None) -> None:
+    """
+    Sample lines of path and write them to output (default stdout).
+
+    Args:
+        path: Input file, or '-' for stdin
+        mode: 'bernoulli', 'reservoir' or 'stratified'
+        rate: Keep probability for bernoulli mode
+        k: Sample size for reservoir mode, or per stratum for stratified mode
+        seed: Seed for reproducible samples
+        key_field: Stratum key field for stratified mode
+        delimiter: Field separator for stratified mode
+        output: Output file, or None / '-' for stdout
+    """
+    rng = random.Random(seed)
+    if (mode == "bernoulli" and path != "-" and os.path.isfile(path)
+            and os.path.getsize(path) > 0 and not is_compressed(path)):
+        out = open_output(output)
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                bernoulli_mmap(mm, rate, rng, out)
+            out.flush()
+        finally:
+            if output not in (None, "-"):
+                out.close()
+        return
+
+    src = open_input(path)
+    out = open_output(output)
+    try:
+        if mode == "bernoulli":
+            out.writelines(_terminated(bernoulli(src, rate, rng)))
+        elif mode == "reservoir":
+            out.writelines(_terminated(reservoir(src, k, rng)))
+        elif mode == "stratified":
+            for lines in stratified(src, k, rng, key_field, delimiter).values():
+                out.writelines(_terminated(lines))
+        else:
+            raise ValueError(f"Unknown sampling mode: {mode}")
+        out.flush()
+    finally:
+        if src is not sys.stdin.buffer:
+            src.close()
+        if output not in (None, "-"):
+            out.close()
+
+
+# ============================================================================
+# PARALLEL CHUNKED SAMPLING
+# ============================================================================
+
+def chunk_ranges(buf, chunk_size: int) -> List[Tuple[int, int]]:
+    """
+    Split buf into (start, end) byte ranges of about chunk_size, each
+    ending just after a newline (or at the end of buf).
+
+    Boundaries depend only on the data and chunk_size, never on the number
+    of workers.
+    """
+    ranges = []
+    start, end = 0, len(buf)
+    while start < end:
+        stop = buf.find(b"\n", min(start + chunk_size, end) - 1)
+        stop = end if stop < 0 else stop + 1
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _chunk_rng(seed: int, index) -> random.Random:
+    """Independent random stream for one chunk, derived from (global seed, chunk index)."""
+    return random.Random(f"samplit:{seed}:{index}")
+
+
+def _count_lines(buf, start: int, end: int) -> int:
+    """Number of lines in buf[start:end], counting an unterminated last line."""
+    count = 0
+    block = SETTINGS["read_buffer"]
+    for pos in range(start, end, block):
+        count += buf[pos:min(pos + block, end)].count(b"\n")
+    if end > start and buf[end - 1:end] != b"\n":
+        count += 1
+    return count
+
+
+def _sample_chunk(task: Tuple) -> Tuple:
+    """
+    Worker: sample one byte range of the input with its own seeded RNG.
+
+    Returns:
+        bernoulli:  ("file", path of a temp file holding the kept lines)
+        reservoir:  (lines in range, [(position, line), ...])
+        stratified: {key: (lines seen, [(position, line), ...])}
+    """
+    path, index, start, end, mode, rate, k, seed, key_field, delimiter, tmpdir = task
+    rng = _chunk_rng(seed, index)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mode == "bernoulli":
+            fd, tmp_path = tempfile.mkstemp(prefix=f"samplit-{index:06d}-", dir=tmpdir)
+            with open(fd, "wb", buffering=SETTINGS["write_buffer"]) as out:
+                bernoulli_mmap(mm, rate, rng, out, start, end)
+            return ("file", tmp_path)
+        if mode == "reservoir":
+            lines = iter(mmap_lines(mm, start, end))
+            sample = list(enumerate(islice(lines, k)))
+            if len(sample) < k:
+                return (len(sample), sample)
+            sample = _reservoir_positions(lines, k, rng, sample)
+            return (_count_lines(mm, start, end), sample)
+        strata = _stratify(mmap_lines(mm, start, end), k, rng, key_field, delimiter)
+        return {key: (st.seen, st.sample) for key, st in strata.items()}
+
+
+def _reservoir_positions(it: Iterator[bytes], k: int, rng: random.Random,
+                         sample: List[Tuple[int, bytes]]) -> List[Tuple[int, bytes]]:
+    """Continue Algorithm L over it, given the first k (position, line) pairs."""
+    position = k - 1
+    w = math.exp(math.log(rng.random() or 1e-300) / k)
+    while True:
+        skip = int(math.log(rng.random() or 1e-300) / math.log1p(-w))
+        line = next(islice(it, skip, None), None)
+        if line is None:
+            return sample
+        position += skip + 1
+        sample[rng.randrange(k)] = (position, line)
+        w *= math.exp(math.log(rng.random() or 1e-300) / k)
+
+
+def _merge_samples(parts: List[Tuple[int, List]], k: int, rng: random.Random) -> List[bytes]:
+    """
+    Combine per-chunk uniform samples into one uniform sample of k lines.
+
+    Each pick chooses a chunk with probability proportional to its lines
+    not yet picked (a sequential hypergeometric draw); the picked lines are
+    then a uniform subset of that chunk's own sample.
+
+    Args:
+        parts: (lines in chunk, [(position, line), ...]) in chunk order
+        k: Sample size
+        rng: Random source
+
+    Returns:
+        Up to k lines, in input order
+    """
+    remaining = [n for n, _ in parts]
+    total = sum(remaining)
+    taken = [0] * len(parts)
+    for _ in range(min(k, total)):
+        r = rng.randrange(total)
+        for i, n in enumerate(remaining):
+            if r < n:
+                break
+            r -= n
+        remaining[i] -= 1
+        taken[i] += 1
+        total -= 1
+
+    merged = []
+    for i, (_, sample) in enumerate(parts):
+        for position, line in rng.sample(sorted(sample), taken[i]):
+            merged.append((i, position, line))
+    merged.sort()
+    return [line for _, _, line in merged]
+
+
+def sample_file_parallel(path: str, mode: str = "bernoulli", rate: float = SETTINGS["rate"],
+                         k: int = 1000, seed: Optional[int] = None, key_field: int = 1,
+                         delimiter: Optional[bytes] = None, output: Optional[str] = None,
+                         workers: Optional[int] = None) -> None:
+    """
+    Sample a regular file in newline-aligned chunks across worker processes.
+
+    Chunk i is sampled with an RNG seeded from (seed, i) and outputs are
+    merged in chunk order, so for a given seed and chunk_size the result is
+    the same for any number of workers (it differs from sample_file's
+    single-stream result).
+
+    Args:
+        path: Input file (must be seekable; stdin is not supported)
+        mode: 'bernoulli', 'reservoir' or 'stratified'
+        rate: Keep probability for bernoulli mode
+        k: Sample size for reservoir mode, or per stratum for stratified mode
+        seed: Seed for reproducible samples (random if None)
+        key_field: Stratum key field for stratified mode
+        delimiter: Field separator for stratified mode
+        output: Output file, or None / '-' for stdout
+        workers: Worker processes (default: CPU count)
+    """
+    if mode not in ("bernoulli", "reservoir", "stratified"):
+        raise ValueError(f"Unknown sampling mode: {mode}")
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(63)
+    if os.path.getsize(path) == 0:
+        return
+    if is_compressed(path):
+        raise ValueError("Parallel sampling needs an uncompressed input file")
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        ranges = chunk_ranges(mm, SETTINGS["chunk_size"])
+
+    out = open_output(output)
+    try:
+        with tempfile.TemporaryDirectory(prefix="samplit-") as tmpdir, \
+                multiprocessing.Pool(workers or os.cpu_count()) as pool:
+            tasks = [(path, i, start, end, mode, rate, k, seed, key_field, delimiter, tmpdir)
+                     for i, (start, end) in enumerate(ranges)]
+            # imap hands results back in chunk order while later chunks run
+            results = pool.imap(_sample_chunk, tasks)
+            if mode == "bernoulli":
+                for _, tmp_path in results:
+                    with open(tmp_path, "rb") as part:
+                        shutil.copyfileobj(part, out, SETTINGS["write_buffer"])
+                    os.remove(tmp_path)
+            elif mode == "reservoir":
+                merged = _merge_samples(list(results), k, _chunk_rng(seed, "merge"))
+                out.writelines(_terminated(merged))
+            else:
+                chunks = list(results)
+                keys = dict.fromkeys(key for strata in chunks for key in strata)
+                rng = _chunk_rng(seed, "merge")
+                for key in keys:
+                    parts = [strata.get(key, (0, [])) for strata in chunks]
+                    out.writelines(_terminated(_merge_samples(parts, k, rng)))
+        out.flush()
+    finally:
+        if output not in (None, "-"):
+            out.close()
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Sample lines from large text files.")
+    parser.add_argument("file", help="Input file ('-' for stdin)")
+    parser.add_argument("--mode", choices=["bernoulli", "reservoir", "stratified"],
+                        default="bernoulli", help="Sampling mode (default: bernoulli)")
+    parser.add_argument("--rate", type=float, default=SETTINGS["rate"],
+                        help=f"Bernoulli keep probability (default: {SETTINGS['rate']})")
+    parser.add_argument("-k", type=int, default=1000,
+                        help="Reservoir size, or per-key size when stratified (default: 1000)")
+    parser.add_argument("--key-field", type=int, default=1,
+                        help="1-based field used as the stratum key (default: 1)")
+    parser.add_argument("--delimiter", default=None,
+                        help="Field delimiter for --key-field (default: whitespace)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    parser.add_argument("-o", "--output", default=None, help="Output file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Sample newline-aligned chunks in this many processes; the "
+                             "result for a seed is the same for any worker count")
+    args = parser.parse_args()
+
+    if not 0.0 <= args.rate <= 1.0:
+        parser.error("--rate must be between 0 and 1")
+    if args.key_field < 1:
+        parser.error("--key-field is 1-based")
+    if args.workers is not None and (args.workers < 1 or not os.path.isfile(args.file)
+                                     or is_compressed(args.file)):
+        parser.error("--workers needs a positive count and an uncompressed regular input file")
+
+    delimiter = args.delimiter.encode("utf-8") if args.delimiter is not None else None
+    try:
+        if args.workers is not None:
+            sample_file_parallel(args.file, args.mode, args.rate, args.k, args.seed,
+                                 args.key_field, delimiter, args.output, args.workers)
+        else:
+            sample_file(args.file, args.mode, args.rate, args.k, args.seed,
+                        args.key_field, delimiter, args.output)
+    except BrokenPipeError:
+        # e.g. piped into head; nothing left to write to
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
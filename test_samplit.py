@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Tests for samplit.py. Every sample is seeded, so each run checks the same
+outputs:
+
+    python -m pytest test_samplit.py
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import samplit
+
+LINES = [f"{i} {'abc'[i % 3]} line {random.Random(i).random()}\n".encode() for i in range(5000)]
+
+
+class SamplitTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="samplit-test-")
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        # Small windows and chunks so a few KB exercise the multi-chunk paths
+        saved = dict(samplit.SETTINGS)
+        self.addCleanup(samplit.SETTINGS.update, saved)
+        samplit.SETTINGS.update(read_buffer=4096, chunk_size=16384)
+
+    def write(self, name, data, opener=open):
+        path = os.path.join(self.tmpdir, name)
+        with opener(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def sample(self, path, parallel=False, **kwargs):
+        output = os.path.join(self.tmpdir, "out")
+        if parallel:
+            samplit.sample_file_parallel(path, output=output, **kwargs)
+        else:
+            samplit.sample_file(path, output=output, **kwargs)
+        with open(output, "rb") as f:
+            return f.read()
+
+
+class TestRateEdges(SamplitTestCase):
+    def test_rate_zero_keeps_nothing(self):
+        path = self.write("in.txt", b"".join(LINES))
+        self.assertEqual(self.sample(path, rate=0.0, seed=1), b"")
+        self.assertEqual(self.sample(path, parallel=True, rate=0.0, seed=1, workers=2), b"")
+
+    def test_rate_one_keeps_everything(self):
+        data = b"".join(LINES)
+        path = self.write("in.txt", data)
+        self.assertEqual(self.sample(path, rate=1.0, seed=1), data)
+        self.assertEqual(self.sample(path, parallel=True, rate=1.0, seed=1, workers=2), data)
+
+    def test_missing_final_newline_is_added(self):
+        data = b"".join(LINES)
+        path = self.write("in.txt", data.rstrip(b"\n"))
+        self.assertEqual(self.sample(path, rate=1.0, seed=1), data)
+        self.assertEqual(self.sample(path, parallel=True, rate=1.0, seed=1, workers=2), data)
+        self.assertEqual(self.sample(path, mode="reservoir", k=len(LINES), seed=1), data)
+
+    def test_single_line_without_newline(self):
+        path = self.write("in.txt", b"only")
+        self.assertEqual(self.sample(path, rate=1.0, seed=1), b"only\n")
+        self.assertEqual(self.sample(path, mode="reservoir", k=3, seed=1), b"only\n")
+
+    def test_empty_input(self):
+        path = self.write("in.txt", b"")
+        self.assertEqual(self.sample(path, rate=1.0, seed=1), b"")
+        self.assertEqual(self.sample(path, parallel=True, rate=1.0, seed=1, workers=2), b"")
+
+
+class TestCompressedInput(SamplitTestCase):
+    def test_compressed_matches_plain(self):
+        data = b"".join(LINES)
+        plain = self.write("in.txt", data)
+        for name, opener in (("in.gz", gzip.open), ("in.bz2", bz2.open), ("in.xz", lzma.open)):
+            compressed = self.write(name, data, opener)
+            for kwargs in ({"rate": 0.05}, {"mode": "reservoir", "k": 50},
+                           {"mode": "stratified", "k": 5, "key_field": 2}):
+                with self.subTest(name=name, **kwargs):
+                    self.assertEqual(self.sample(compressed, seed=7, **kwargs),
+                                     self.sample(plain, seed=7, **kwargs))
+
+    def test_concatenated_gzip_members(self):
+        data = b"".join(LINES)
+        half = len(LINES) // 2
+        path = self.write("in.gz", gzip.compress(b"".join(LINES[:half]))
+                          + gzip.compress(b"".join(LINES[half:])))
+        self.assertEqual(self.sample(path, rate=1.0, seed=1), data)
+
+    @unittest.skipIf(samplit.zstandard is None, "zstandard is not installed")
+    def test_concatenated_zstd_frames(self):
+        data = b"".join(LINES)
+        half = len(LINES) // 2
+        compressor = samplit.zstandard.ZstdCompressor()
+        path = self.write("in.zst", compressor.compress(b"".join(LINES[:half]))
+                          + compressor.compress(b"".join(LINES[half:])))
+        self.assertEqual(self.sample(path, rate=1.0, seed=1), data)
+
+
+class TestReservoir(SamplitTestCase):
+    def test_exactly_k_distinct_lines_in_input_order(self):
+        path = self.write("in.txt", b"".join(LINES))
+        for parallel in (False, True):
+            for k in (1, 10, 999):
+                with self.subTest(parallel=parallel, k=k):
+                    kwargs = {"workers": 2} if parallel else {}
+                    out = self.sample(path, parallel=parallel, mode="reservoir", k=k,
+                                      seed=3, **kwargs)
+                    lines = out.splitlines(keepends=True)
+                    self.assertEqual(len(lines), k)
+                    self.assertEqual(len(set(lines)), k)
+                    positions = [LINES.index(line) for line in lines]
+                    self.assertEqual(positions, sorted(positions))
+
+    def test_short_input_returns_every_line(self):
+        path = self.write("in.txt", b"".join(LINES[:5]))
+        self.assertEqual(self.sample(path, mode="reservoir", k=10, seed=3), b"".join(LINES[:5]))
+
+    def test_seed_is_reproducible(self):
+        path = self.write("in.txt", b"".join(LINES))
+        first = self.sample(path, mode="reservoir", k=20, seed=11)
+        self.assertEqual(self.sample(path, mode="reservoir", k=20, seed=11), first)
+        self.assertNotEqual(self.sample(path, mode="reservoir", k=20, seed=12), first)
+
+
+class TestParallel(SamplitTestCase):
+    def test_same_output_for_any_worker_count(self):
+        path = self.write("in.txt", b"".join(LINES))
+        self.assertGreater(len(samplit.chunk_ranges(b"".join(LINES), 16384)), 2)
+        for kwargs in ({"rate": 0.05}, {"mode": "reservoir", "k": 50},
+                       {"mode": "stratified", "k": 5, "key_field": 2}):
+            with self.subTest(**kwargs):
+                serial = self.sample(path, parallel=True, seed=5, workers=1, **kwargs)
+                self.assertTrue(serial)
+                for workers in (2, 4):
+                    self.assertEqual(self.sample(path, parallel=True, seed=5,
+                                                 workers=workers, **kwargs), serial)
+
+    def test_full_rate_matches_serial_sampler(self):
+        path = self.write("in.txt", b"".join(LINES))
+        self.assertEqual(self.sample(path, parallel=True, rate=1.0, seed=5, workers=3),
+                         self.sample(path, rate=1.0, seed=5))
+
+    def test_chunks_are_line_aligned_and_cover_input(self):
+        data = b"".join(LINES).rstrip(b"\n")
+        ranges = samplit.chunk_ranges(data, 1000)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], len(data))
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(data[end - 1:end], b"\n")
+
+
+if __name__ == "__main__":
+    unittest.main()